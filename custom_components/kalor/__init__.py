@@ -4,10 +4,26 @@ from __future__ import annotations
 
 from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.typing import ConfigType
 
-from .const import DEFAULT_HOST, DEFAULT_PORT
+from .const import (
+    CONF_TRANSPORT,
+    DATA_PENDING_CLIENTS,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    STORAGE_VERSION,
+)
+from .alarms import alarm_store_key
 from .coordinator import KalorConfigEntry, KalorCoordinator
 from .duepi_client import DuepiClient
+from .schedule import schedule_store_key
+from .services import async_setup_services
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 PLATFORMS: list[Platform] = [
     Platform.BINARY_SENSOR,
@@ -18,18 +34,39 @@ PLATFORMS: list[Platform] = [
 ]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Настройка компонента — регистрация сервисов."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: KalorConfigEntry) -> bool:
     """Настройка Kalor из config entry."""
-    client = DuepiClient(
+    # Соединение, уже проверенное config flow, используем повторно
+    pending: dict[str, DuepiClient] = hass.data.get(DOMAIN, {}).get(
+        DATA_PENDING_CLIENTS, {}
+    )
+    client = pending.pop(entry.data["device_code"], None) or DuepiClient(
         host=entry.data.get("host", DEFAULT_HOST),
         port=entry.data.get("port", DEFAULT_PORT),
         device_code=entry.data["device_code"],
+        transport=entry.data.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
     )
 
     coordinator = KalorCoordinator(hass, entry, client)
-    await coordinator.async_config_entry_first_refresh()
+    if await coordinator.async_restore_last_data():
+        # Entities поднимаются с последним известным состоянием,
+        # живой поллинг — в фоне, не блокируя старт HA
+        entry.async_create_background_task(
+            hass,
+            coordinator.async_refresh(),
+            f"{DOMAIN}_first_refresh_{entry.entry_id}",
+        )
+    else:
+        await coordinator.async_config_entry_first_refresh()
 
     entry.runtime_data = coordinator
+    entry.async_on_unload(coordinator.schedule.async_start())
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
@@ -39,4 +76,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: KalorConfigEntry) -> bo
     result = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if result:
         await entry.runtime_data.client.disconnect()
+        await entry.runtime_data.client.async_stop_capture()
     return result
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: KalorConfigEntry) -> None:
+    """Удаление Kalor — чистим хранилища."""
+    await Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry.entry_id}").async_remove()
+    await Store(hass, STORAGE_VERSION, alarm_store_key(entry.entry_id)).async_remove()
+    await Store(
+        hass, STORAGE_VERSION, schedule_store_key(entry.entry_id)
+    ).async_remove()
@@ -0,0 +1,77 @@
+"""История алармов Kalor — ограниченный кольцевой буфер с персистом.
+
+Запись компактная: [unix_ts, code, previous_code]. Текст ошибки
+не хранится, а берётся из ERROR_CODES при выдаче.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ALARM_HISTORY_SAVE_DELAY,
+    ALARM_HISTORY_SIZE,
+    DOMAIN,
+    ERROR_CODES,
+    STORAGE_VERSION,
+)
+
+
+def alarm_store_key(entry_id: str) -> str:
+    """Ключ Store истории алармов для config entry."""
+    return f"{DOMAIN}.{entry_id}.alarms"
+
+
+def alarm_text(code: int) -> str:
+    """Текст ошибки по коду."""
+    return ERROR_CODES.get(code, f"Error {code}")
+
+
+class KalorAlarmHistory:
+    """Последние ALARM_HISTORY_SIZE переходов alarm_code одной печи."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Инициализация пустой истории."""
+        self._records: deque[tuple[int, int, int]] = deque(
+            maxlen=ALARM_HISTORY_SIZE
+        )
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, alarm_store_key(entry_id)
+        )
+
+    async def async_load(self) -> None:
+        """Загрузить историю из хранилища."""
+        stored = await self._store.async_load()
+        if stored:
+            self._records.extend(tuple(rec) for rec in stored.get("records", []))
+
+    @callback
+    def async_record(self, ts: float, code: int, previous_code: int) -> None:
+        """Добавить переход и отложенно сохранить."""
+        self._records.append((int(ts), code, previous_code))
+        self._store.async_delay_save(self._data_to_store, ALARM_HISTORY_SAVE_DELAY)
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Снимок для записи на диск."""
+        return {"records": [list(rec) for rec in self._records]}
+
+    def as_list(self, limit: int | None = None) -> list[dict[str, Any]]:
+        """Записи от новых к старым в развёрнутом виде."""
+        records = list(reversed(self._records))
+        if limit is not None:
+            records = records[:limit]
+        return [
+            {
+                "time": dt_util.utc_from_timestamp(ts).isoformat(),
+                "alarm_code": code,
+                "alarm_text": alarm_text(code),
+                "previous_code": previous_code,
+                "cleared": code == 0,
+            }
+            for ts, code, previous_code in records
+        ]
@@ -0,0 +1,121 @@
+"""Запись трафика DuepiClient для офлайн-воспроизведения.
+
+Формат — JSON lines. Первая строка — заголовок сессии, дальше
+компактные события [t_ms, kind, ...], t_ms — от начала записи:
+
+    c            соединение установлено
+    cf err       не удалось подключиться
+    h            отправлен хендшейк
+    q cmd        отправлена команда
+    r reply      получен 10-байтный ответ (latin-1)
+    t cmd        таймаут ответа
+    x cmd err    соединение оборвано / ошибка сокета
+    d            клиент закрыл соединение
+
+Воспроизведение: tools/kalor_replay.py. Он грузит этот файл без
+пакета интеграции, поэтому здесь только stdlib.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+CAPTURE_VERSION = 1
+CAPTURE_FLUSH_EVERY = 64  # Событий в буфере до записи на диск
+
+EVENT_CONNECT = "c"
+EVENT_CONNECT_FAILED = "cf"
+EVENT_HANDSHAKE = "h"
+EVENT_REQUEST = "q"
+EVENT_REPLY = "r"
+EVENT_TIMEOUT = "t"
+EVENT_ERROR = "x"
+EVENT_DISCONNECT = "d"
+
+
+class DuepiCapture:
+    """Буферизованная запись событий одной сессии в файл."""
+
+    def __init__(self, path: Path, header: dict[str, Any]) -> None:
+        """Начать запись; файл создаётся при первом сбросе буфера."""
+        self.path = path
+        self._started = time.monotonic()
+        self._lines: list[str] = [
+            _dumps(
+                {
+                    "v": CAPTURE_VERSION,
+                    "started": datetime.now(UTC).isoformat(),
+                    **header,
+                }
+            )
+        ]
+        self._first_flush = True
+        self._flush_task: asyncio.Task[None] | None = None
+
+    def record(self, kind: str, *payload: str) -> None:
+        """Добавить событие; сброс на диск — в фоне, не блокируя loop."""
+        t_ms = round((time.monotonic() - self._started) * 1000, 1)
+        self._lines.append(_dumps([t_ms, kind, *payload]))
+        if len(self._lines) >= CAPTURE_FLUSH_EVERY and self._flush_task is None:
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush())
+
+    async def async_close(self) -> None:
+        """Дописать остаток буфера."""
+        if self._flush_task is not None:
+            await self._flush_task
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Записать накопленные строки в executor."""
+        lines, self._lines = self._lines, []
+        mode, self._first_flush = ("w" if self._first_flush else "a"), False
+        try:
+            if lines:
+                await asyncio.to_thread(_write_lines, self.path, lines, mode)
+        finally:
+            self._flush_task = None
+
+
+def _dumps(obj: Any) -> str:
+    """Компактный JSON."""
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=True)
+
+
+def _write_lines(path: Path, lines: list[str], mode: str) -> None:
+    """Блокирующая запись (вызывается в executor)."""
+    with path.open(mode, encoding="ascii") as fp:
+        fp.write("\n".join(lines) + "\n")
+
+
+def load_capture(path: Path) -> tuple[dict[str, Any], list[list[Any]]]:
+    """Прочитать запись: (заголовок, события)."""
+    with path.open(encoding="ascii") as fp:
+        header = json.loads(fp.readline())
+        events = [json.loads(line) for line in fp if line.strip()]
+    if header.get("v") != CAPTURE_VERSION:
+        raise ValueError(f"Неподдерживаемая версия записи: {header.get('v')}")
+    return header, events
+
+
+def split_sessions(events: list[list[Any]]) -> Iterator[list[list[Any]]]:
+    """Разбить события на TCP-сессии по событию соединения.
+
+    События до первого соединения (запись включена на живой сессии)
+    образуют первую сессию.
+    """
+    session: list[list[Any]] = []
+    for event in events:
+        if event[1] == EVENT_CONNECT_FAILED:
+            continue
+        if event[1] == EVENT_CONNECT and session:
+            yield session
+            session = []
+        session.append(event)
+    if session:
+        yield session
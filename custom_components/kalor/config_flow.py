@@ -7,11 +7,36 @@ from typing import Any
 import voluptuous as vol
 
 from homeassistant.config_entries import ConfigFlow, ConfigFlowResult
+from homeassistant.core import HomeAssistant
 
-from .const import DEFAULT_HOST, DEFAULT_PORT, DOMAIN, LOGGER
+from .const import (
+    CONF_TRANSPORT,
+    DATA_PENDING_CLIENTS,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    LOGGER,
+    TRANSPORT_PROTOCOL,
+    TRANSPORT_STREAM,
+)
 from .duepi_client import DuepiClient
 
 
+def entry_title(device_code: str) -> str:
+    """Заголовок config entry печи."""
+    return f"Kalor ({device_code[:6]}...)"
+
+
+def stash_validated_client(
+    hass: HomeAssistant, device_code: str, client: DuepiClient
+) -> None:
+    """Передать проверенное живое соединение в async_setup_entry."""
+    hass.data.setdefault(DOMAIN, {}).setdefault(DATA_PENDING_CLIENTS, {})[
+        device_code
+    ] = client
+
+
 class KalorConfigFlow(ConfigFlow, domain=DOMAIN):
     """Kalor config flow — host, port, device_code."""
 
@@ -35,10 +60,12 @@ class KalorConfigFlow(ConfigFlow, domain=DOMAIN):
                 host=user_input.get("host", DEFAULT_HOST),
                 port=user_input.get("port", DEFAULT_PORT),
                 device_code=device_code,
+                transport=user_input.get(CONF_TRANSPORT, DEFAULT_TRANSPORT),
             )
-            if await client.async_test_connection():
+            if await client.async_test_connection(keep_connected=True):
+                stash_validated_client(self.hass, device_code, client)
                 return self.async_create_entry(
-                    title=f"Kalor ({device_code[:6]}...)",
+                    title=entry_title(device_code),
                     data=user_input,
                 )
 
@@ -52,7 +79,22 @@ class KalorConfigFlow(ConfigFlow, domain=DOMAIN):
                     vol.Required("device_code"): str,
                     vol.Optional("host", default=DEFAULT_HOST): str,
                     vol.Optional("port", default=DEFAULT_PORT): int,
+                    vol.Optional(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+                        [TRANSPORT_STREAM, TRANSPORT_PROTOCOL]
+                    ),
                 }
             ),
             errors=errors,
         )
+
+    async def async_step_import(
+        self, import_data: dict[str, Any]
+    ) -> ConfigFlowResult:
+        """Импорт печи, уже проверенной сервисом import_stoves."""
+        device_code = import_data["device_code"]
+        await self.async_set_unique_id(device_code)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=entry_title(device_code),
+            data=import_data,
+        )
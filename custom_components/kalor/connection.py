@@ -0,0 +1,81 @@
+"""Установка TCP-соединения с реле: кэш DNS, happy eyeballs, опции сокета.
+
+Крошечные 10–12-байтные кадры не должны ждать Nagle (TCP_NODELAY),
+а мёртвая сессия реле должна обнаруживаться ядром (keepalive,
+TCP_USER_TIMEOUT), а не таймаутом следующей команды.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import time
+
+from aiohappyeyeballs import AddrInfoType, start_connection
+
+from .const import (
+    DNS_CACHE_TTL,
+    HAPPY_EYEBALLS_DELAY,
+    KEEPALIVE_COUNT,
+    KEEPALIVE_IDLE,
+    KEEPALIVE_INTERVAL,
+    LOGGER,
+    TCP_USER_TIMEOUT_MS,
+)
+
+# (host, port) → (monotonic истечения, адреса)
+_dns_cache: dict[tuple[str, int], tuple[float, list[AddrInfoType]]] = {}
+
+
+async def async_resolve(host: str, port: int) -> list[AddrInfoType]:
+    """Адреса хоста из кэша или через getaddrinfo."""
+    key = (host, port)
+    cached = _dns_cache.get(key)
+    now = time.monotonic()
+    if cached is not None and cached[0] > now:
+        return cached[1]
+    infos = await asyncio.get_running_loop().getaddrinfo(
+        host, port, type=socket.SOCK_STREAM
+    )
+    _dns_cache[key] = (now + DNS_CACHE_TTL, infos)
+    return infos
+
+
+def invalidate_dns(host: str, port: int) -> None:
+    """Забыть адреса хоста — после неудачного подключения."""
+    _dns_cache.pop((host, port), None)
+
+
+def tune_socket(sock: socket.socket) -> None:
+    """TCP_NODELAY + агрессивный keepalive там, где ОС это умеет."""
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    options = (
+        ("TCP_KEEPIDLE", KEEPALIVE_IDLE),  # Linux
+        ("TCP_KEEPALIVE", KEEPALIVE_IDLE),  # macOS
+        ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+        ("TCP_KEEPCNT", KEEPALIVE_COUNT),
+        ("TCP_USER_TIMEOUT", TCP_USER_TIMEOUT_MS),  # Linux
+    )
+    for name, value in options:
+        option = getattr(socket, name, None)
+        if option is None:
+            continue
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, option, value)
+        except OSError as err:
+            LOGGER.debug("Не удалось выставить %s: %s", name, err)
+
+
+async def async_open_socket(host: str, port: int) -> socket.socket:
+    """Подключённый и настроенный неблокирующий сокет до реле."""
+    infos = await async_resolve(host, port)
+    try:
+        sock = await start_connection(
+            infos, happy_eyeballs_delay=HAPPY_EYEBALLS_DELAY, interleave=1
+        )
+    except OSError:
+        invalidate_dns(host, port)
+        raise
+    tune_socket(sock)
+    return sock
@@ -11,6 +11,76 @@ LOGGER = logging.getLogger(__package__)
 # Интервал поллинга — 12 секунд (как в TypeScript оригинале)
 SCAN_INTERVAL = timedelta(seconds=12)
 
+# Транспорт DuepiClient
+CONF_TRANSPORT = "transport"
+TRANSPORT_STREAM = "stream"  # StreamReader/StreamWriter + wait_for
+TRANSPORT_PROTOCOL = "protocol"  # asyncio.BufferedProtocol, общий таймер таймаутов
+DEFAULT_TRANSPORT = TRANSPORT_STREAM
+
+# Хранилище последнего StoveData (быстрый старт без блокирующего поллинга)
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # сек, debounce записи на диск
+RESTORE_MAX_AGE = 900  # сек, снимок старше не восстанавливается при старте
+
+# Накопительные метрики
+METRICS_MAX_GAP = 120  # сек, разрывы между сэмплами длиннее не интегрируются
+PELLET_KG_PER_SPEED_HOUR = 0.1  # кг на единицу pellet_speed за час (калибровка)
+
+# События и история алармов
+EVENT_ALARM = f"{DOMAIN}_alarm"  # Изменился alarm_code (DA000)
+EVENT_STATUS_CHANGED = f"{DOMAIN}_status_changed"  # Изменился статус печи
+ALARM_HISTORY_SIZE = 200  # Записей на печь
+ALARM_HISTORY_SAVE_DELAY = 10  # сек, debounce записи истории
+
+# История снимков StoveData (в памяти)
+SNAPSHOT_HISTORY_SIZE = 720  # Различных снимков на печь
+
+# Расписание
+SCHEDULE_SAVE_DELAY = 5  # сек, debounce записи слотов
+
+# Скан сырых регистров
+REGISTER_CACHE_TTL = 60  # сек, по умолчанию для max_age
+REGISTER_SCAN_MAX = 256  # Регистров за один вызов
+# {reg}000 для этих кодов — запись: F0xx0 питание/мощность, F2xx0 уставка,
+# D6000 сброс ошибки. Скан их никогда не отправляет.
+WRITE_REGISTERS = frozenset({"D6", *(f"F{low:X}" for low in range(16))})
+
+# Пакетный импорт печей
+IMPORT_CONCURRENCY = 10  # Одновременных проверок подключения
+IMPORT_MAX_CONCURRENCY = 100
+
+# Сервисы
+SERVICE_GET_ALARM_HISTORY = "get_alarm_history"
+SERVICE_GET_SCHEDULE = "get_schedule"
+SERVICE_SET_SCHEDULE_SLOT = "set_schedule_slot"
+SERVICE_REMOVE_SCHEDULE_SLOT = "remove_schedule_slot"
+SERVICE_SCAN_REGISTERS = "scan_registers"
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+SERVICE_IMPORT_STOVES = "import_stoves"
+SERVICE_GET_STOVE_HISTORY = "get_stove_history"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_LIMIT = "limit"
+ATTR_SLOT_ID = "slot_id"
+ATTR_DAY_OF_WEEK = "day_of_week"
+ATTR_START_TIME = "start_time"
+ATTR_END_TIME = "end_time"
+ATTR_TARGET_TEMPERATURE = "target_temperature"
+ATTR_POWER_LEVEL = "power_level"
+ATTR_ENABLED = "enabled"
+ATTR_REGISTERS = "registers"
+ATTR_RANGE_START = "range_start"
+ATTR_RANGE_END = "range_end"
+ATTR_MAX_AGE = "max_age"
+ATTR_DEVICE_CODES = "device_codes"
+ATTR_HOST = "host"
+ATTR_PORT = "port"
+ATTR_MAX_CONCURRENCY = "max_concurrency"
+ATTR_FIELDS = "fields"
+
+# Ключ hass.data для соединений, проверенных config flow
+DATA_PENDING_CLIENTS = "pending_clients"
+
 # Дефолтные параметры подключения
 DEFAULT_HOST = "duepiwebserver2.com"
 DEFAULT_PORT = 3000
@@ -70,3 +140,17 @@ COMMAND_DELAY = 0.2  # 200 мс между командами
 SOCKET_TIMEOUT = 5.0  # 5 сек таймаут сокета
 RESPONSE_LENGTH = 10  # Ответ всегда 10 байт ASCII
 HANDSHAKE_DELAY = 0.5  # 500 мс после хендшейка
+
+# --- TCP соединение ---
+DNS_CACHE_TTL = 300  # сек, кэш адресов реле
+HAPPY_EYEBALLS_DELAY = 0.25  # сек, RFC 8305
+# Таймеры обнаружения мёртвого реле связаны: ядро рвёт сессию через
+# KEEPALIVE_DEAD_AFTER сек простоя, проверка живости идёт после этого
+# и успевает переподключиться до следующего поллинга (SCAN_INTERVAL)
+KEEPALIVE_IDLE = 2  # сек простоя до первого keepalive
+KEEPALIVE_INTERVAL = 1  # сек между keepalive
+KEEPALIVE_COUNT = 3  # Неотвеченных keepalive до разрыва
+KEEPALIVE_DEAD_AFTER = KEEPALIVE_IDLE + KEEPALIVE_INTERVAL * KEEPALIVE_COUNT
+# Неподтверждённые данные или keepalive → разрыв (Linux); не раньше keepalive
+TCP_USER_TIMEOUT_MS = KEEPALIVE_DEAD_AFTER * 1000
+LIVENESS_DELAY = KEEPALIVE_DEAD_AFTER + 1  # сек после поллинга до проверки
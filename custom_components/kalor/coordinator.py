@@ -2,15 +2,37 @@
 
 from __future__ import annotations
 
+from datetime import datetime
+from typing import Any
+
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
+from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, LOGGER, SCAN_INTERVAL
+from .alarms import KalorAlarmHistory
+from .const import (
+    ATTR_CONFIG_ENTRY_ID,
+    DOMAIN,
+    EVENT_ALARM,
+    EVENT_STATUS_CHANGED,
+    LIVENESS_DELAY,
+    LOGGER,
+    RESTORE_MAX_AGE,
+    SCAN_INTERVAL,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
 from .duepi_client import DuepiClient, DuepiCommandError, DuepiConnectionError, StoveData
+from .history import StoveHistory
+from .metrics import KalorMetrics
+from .registers import RegisterScanner
+from .schedule import KalorSchedule
 
 type KalorConfigEntry = ConfigEntry[KalorCoordinator]
 
@@ -34,11 +56,67 @@ class KalorCoordinator(DataUpdateCoordinator[StoveData]):
             config_entry=config_entry,
             name=DOMAIN,
             update_interval=SCAN_INTERVAL,
+            # StoveData неизменяем и сравнивается по сырым регистрам:
+            # неизменившийся поллинг не будит entities
+            always_update=False,
         )
         self.client = client
+        self.metrics = KalorMetrics()
+        self.alarm_history = KalorAlarmHistory(hass, config_entry.entry_id)
+        self.history = StoveHistory()
+        self.schedule = KalorSchedule(hass, self)
+        self.registers = RegisterScanner(client)
+        # Unix time поллинга, которым получен self.data; True — данные
+        # из Store, живого поллинга после старта ещё не было
+        self.data_timestamp: float | None = None
+        self.data_restored = False
+        self._unsub_liveness: CALLBACK_TYPE | None = None
+        self._metrics_listeners: list[CALLBACK_TYPE] = []
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{config_entry.entry_id}"
+        )
+
+    async def async_restore_last_data(self) -> bool:
+        """Поднять из хранилищ историю алармов, расписание, метрики и StoveData.
+
+        Возвращает True, если StoveData восстановлен и entities могут
+        стартовать сразу, не дожидаясь живого поллинга. Снимок без
+        времени поллинга или старше RESTORE_MAX_AGE не восстанавливается.
+        """
+        await self.alarm_history.async_load()
+        await self.schedule.async_load()
+        stored = await self._store.async_load()
+        if not stored:
+            return False
+        if stored.get("metrics"):
+            self.metrics = KalorMetrics.from_dict(stored["metrics"])
+        data_ts = stored.get("data_ts")
+        age = dt_util.utcnow().timestamp() - data_ts if data_ts else None
+        if age is None or not 0 <= age <= RESTORE_MAX_AGE:
+            LOGGER.debug("Сохранённый StoveData устарел (возраст %s с)", age)
+            return False
+        try:
+            data = StoveData.from_dict(stored["data"])
+        except (KeyError, TypeError, ValueError) as err:
+            LOGGER.debug("Не удалось восстановить StoveData: %s", err)
+            return False
+        self.data_timestamp = data_ts
+        self.data_restored = True
+        self.async_set_updated_data(data)
+        return True
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Снимок для записи на диск."""
+        return {
+            "data": self.data.as_dict() if self.data else None,
+            "data_ts": self.data_timestamp,
+            "metrics": self.metrics.as_dict(),
+        }
 
     async def _async_setup(self) -> None:
         """Первое подключение при инициализации."""
+        if self.client.connected:
+            return  # Соединение уже проверено config flow
         try:
             await self.client.connect()
         except DuepiConnectionError as err:
@@ -47,6 +125,110 @@ class KalorCoordinator(DataUpdateCoordinator[StoveData]):
     async def _async_update_data(self) -> StoveData:
         """Поллинг всех регистров печи."""
         try:
-            return await self.client.async_get_stove_data()
+            data = await self.client.async_get_stove_data()
         except (DuepiConnectionError, DuepiCommandError) as err:
             raise UpdateFailed(f"Ошибка обновления данных: {err}") from err
+        now = dt_util.utcnow().timestamp()
+        metrics_changed = self.metrics.update(data, now)
+        if self.data is not None:
+            if changes := self.data.diff(data):
+                self._async_fire_transitions(self.data, data, changes, now)
+            else:
+                data = self.data  # Тот же снимок — делим один объект
+                # always_update=False не разбудит entities, а моточасы
+                # и расход растут и при неизменных регистрах
+                if metrics_changed:
+                    self._async_update_metrics_listeners()
+        self.data_timestamp = now
+        self.data_restored = False
+        self.history.record(now, data)
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        self._async_schedule_liveness_check()
+        return data
+
+    @callback
+    def async_add_metrics_listener(
+        self, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Подписка сенсоров метрик на обновления счётчиков без смены StoveData."""
+        self._metrics_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            self._metrics_listeners.remove(update_callback)
+
+        return remove_listener
+
+    @callback
+    def _async_update_metrics_listeners(self) -> None:
+        """Обновить только сенсоры метрик."""
+        for update_callback in list(self._metrics_listeners):
+            update_callback()
+
+    @callback
+    def _async_schedule_liveness_check(self) -> None:
+        """Проверить соединение, когда ядро уже могло заметить мёртвое реле.
+
+        LIVENESS_DELAY отсчитывается от конца поллинга и больше времени
+        обнаружения keepalive, поэтому разрыв уже виден, а до следующего
+        поллинга остаётся время переподключиться.
+        """
+        if self._unsub_liveness:
+            self._unsub_liveness()
+        self._unsub_liveness = async_call_later(
+            self.hass, LIVENESS_DELAY, self._async_check_liveness
+        )
+
+    async def _async_check_liveness(self, _now: datetime) -> None:
+        """Переподключиться заранее, если реле закрыло сессию."""
+        self._unsub_liveness = None
+        try:
+            await self.client.async_ensure_alive()
+        except DuepiConnectionError as err:
+            LOGGER.debug("Проверка соединения не удалась: %s", err)
+
+    async def async_shutdown(self) -> None:
+        """Остановка координатора — снять проверку соединения."""
+        if self._unsub_liveness:
+            self._unsub_liveness()
+            self._unsub_liveness = None
+        await super().async_shutdown()
+
+    @callback
+    def _async_fire_transitions(
+        self,
+        previous: StoveData,
+        current: StoveData,
+        changes: dict[str, tuple[int, int]],
+        now: float,
+    ) -> None:
+        """События только на фронтах: смена alarm_code и статуса печи."""
+        base = {
+            ATTR_CONFIG_ENTRY_ID: self.config_entry.entry_id,
+            "device_code": self.config_entry.data["device_code"],
+        }
+        if "alarm_code" in changes:
+            self.alarm_history.async_record(
+                now, current.alarm_code, previous.alarm_code
+            )
+            self.hass.bus.async_fire(
+                EVENT_ALARM,
+                {
+                    **base,
+                    "alarm_code": current.alarm_code,
+                    "alarm_text": current.alarm_text,
+                    "previous_code": previous.alarm_code,
+                    "cleared": not current.has_alarm,
+                },
+            )
+        if "status_raw" in changes and current.status_text != previous.status_text:
+            self.hass.bus.async_fire(
+                EVENT_STATUS_CHANGED,
+                {
+                    **base,
+                    "status": current.status_text,
+                    "status_raw": current.status_raw,
+                    "previous_status": previous.status_text,
+                    "previous_status_raw": previous.status_raw,
+                },
+            )
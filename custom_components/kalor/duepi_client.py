@@ -8,7 +8,25 @@
 from __future__ import annotations
 
 import asyncio
-from dataclasses import dataclass
+import socket
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, fields
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from .capture import (
+    EVENT_CONNECT,
+    EVENT_CONNECT_FAILED,
+    EVENT_DISCONNECT,
+    EVENT_ERROR,
+    EVENT_HANDSHAKE,
+    EVENT_REPLY,
+    EVENT_REQUEST,
+    EVENT_TIMEOUT,
+    DuepiCapture,
+)
 
 from .const import (
     CMD_GET_ERROR,
@@ -36,28 +54,114 @@ from .const import (
     STATE_IGNITION,
     STATE_OFF,
     STATE_WORKING,
+    TRANSPORT_PROTOCOL,
+    TRANSPORT_STREAM,
+    WRITE_REGISTERS,
 )
+from .connection import async_open_socket
+from .transport import DuepiProtocol
 
 ESC = "\x1b"
 
 
-@dataclass
+@lru_cache(maxsize=64)
+def status_text(state: int) -> str:
+    """Маппинг 32-bit статуса в текст (различных статусов единицы — кэш)."""
+    if state & STATE_WORKING:
+        return "Working"
+    if state & STATE_IGNITION:
+        return "Ignition"
+    if state & STATE_CLEANING:
+        return "Cleaning"
+    if state & STATE_COOLING:
+        return "Cooling"
+    if state & STATE_ECO:
+        return "Eco Standby"
+    if state & STATE_OFF or state == 0:
+        return "Off"
+    return f"Unknown (0x{state:08x})"
+
+
+@dataclass(frozen=True, slots=True)
 class StoveData:
-    """Состояние печи — результат полного поллинга."""
-
-    status_raw: int  # Сырой 32-bit статус
-    status_text: str  # Человекочитаемый статус
-    is_on: bool  # Печь включена (горит/розжиг/чистка)
-    is_heating: bool  # Активно нагревает (WORKING | IGNITION)
-    room_temp: float  # Комнатная температура, °C
-    target_temp: int  # Целевая температура, °C
-    fumes_temp: int  # Температура дымовых газов, °C
-    power_level: int  # Уровень мощности (0-6)
-    pellet_speed: int  # Скорость подачи пеллет
-    fan_speed: int  # Обороты вытяжки, RPM
-    alarm_code: int  # Код ошибки (0 = нет)
-    alarm_text: str  # Текст ошибки
-    has_alarm: bool  # Есть активная ошибка
+    """Снимок печи — только сырые значения регистров.
+
+    Производные поля (текст статуса, флаги, текст ошибки, единицы)
+    считаются лениво в свойствах, поэтому снимок компактен и годится
+    для хранения в истории, а сравнение снимков дешёвое.
+    """
+
+    status_raw: int  # Сырой 32-bit статус (D9000)
+    room_raw: int  # Комнатная температура ×10 (D1000)
+    target_temp: int  # Целевая температура, °C (C6000)
+    fumes_temp: int  # Температура дымовых газов, °C (D0000)
+    power_level: int  # Уровень мощности 0-6 (D3000)
+    pellet_speed: int  # Скорость подачи пеллет (D4000)
+    fan_raw: int  # Обороты вытяжки / 10 (EF000)
+    alarm_code: int  # Код ошибки, 0 = нет (DA000)
+
+    @property
+    def status_text(self) -> str:
+        """Человекочитаемый статус."""
+        return status_text(self.status_raw)
+
+    @property
+    def is_on(self) -> bool:
+        """Печь включена: горит, розжиг или чистка."""
+        return bool(
+            self.status_raw & (STATE_WORKING | STATE_IGNITION | STATE_CLEANING)
+        )
+
+    @property
+    def is_heating(self) -> bool:
+        """Активно нагревает: горит или розжиг."""
+        return bool(self.status_raw & (STATE_WORKING | STATE_IGNITION))
+
+    @property
+    def room_temp(self) -> float:
+        """Комнатная температура, °C."""
+        return self.room_raw / 10
+
+    @property
+    def fan_speed(self) -> int:
+        """Обороты вытяжки, RPM."""
+        return self.fan_raw * 10
+
+    @property
+    def alarm_text(self) -> str:
+        """Текст ошибки."""
+        return ERROR_CODES.get(self.alarm_code, f"Error {self.alarm_code}")
+
+    @property
+    def has_alarm(self) -> bool:
+        """Есть активная ошибка."""
+        return self.alarm_code > 0
+
+    def diff(self, other: StoveData) -> dict[str, tuple[int, int]]:
+        """Изменившиеся сырые поля: имя → (self, other)."""
+        changes: dict[str, tuple[int, int]] = {}
+        for name in _RAW_FIELDS:
+            old, new = getattr(self, name), getattr(other, name)
+            if old != new:
+                changes[name] = (old, new)
+        return changes
+
+    def as_dict(self) -> dict[str, int]:
+        """Сырые поля для Store."""
+        return {name: getattr(self, name) for name in _RAW_FIELDS}
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> StoveData:
+        """Из Store; понимает и прежний формат с производными полями."""
+        data = dict(raw)
+        if "room_raw" not in data and "room_temp" in data:
+            data["room_raw"] = round(data["room_temp"] * 10)
+        if "fan_raw" not in data and "fan_speed" in data:
+            data["fan_raw"] = data["fan_speed"] // 10
+        return cls(**{name: int(data[name]) for name in _RAW_FIELDS})
+
+
+_RAW_FIELDS: tuple[str, ...] = tuple(f.name for f in fields(StoveData))
 
 
 class DuepiConnectionError(Exception):
@@ -71,35 +175,93 @@ class DuepiCommandError(Exception):
 class DuepiClient:
     """Asyncio TCP клиент для Duepi EVO protocol."""
 
-    def __init__(self, host: str, port: int, device_code: str) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        device_code: str,
+        transport: str = TRANSPORT_STREAM,
+    ) -> None:
         self._host = host
         self._port = port
         self._device_code = device_code
+        self._use_protocol = transport == TRANSPORT_PROTOCOL
         self._reader: asyncio.StreamReader | None = None
         self._writer: asyncio.StreamWriter | None = None
+        self._protocol: DuepiProtocol | None = None
         self._lock = asyncio.Lock()  # Сериализация команд
         self._connected = False
+        # Обычные команды и поллинг в работе — фоновые команды их пропускают
+        self._foreground_count = 0
+        self._foreground_idle = asyncio.Event()
+        self._foreground_idle.set()
+        self._capture: DuepiCapture | None = None
+
+    # --- Запись трафика ---
+
+    def start_capture(self, path: Path) -> None:
+        """Включить запись обменов в файл (opt-in, для отладки)."""
+        if self._capture is not None:
+            raise RuntimeError(f"Запись уже идёт: {self._capture.path}")
+        self._capture = DuepiCapture(
+            path,
+            {
+                "host": self._host,
+                "port": self._port,
+                "device": self._device_code[:6],
+                "connected": self.connected,
+            },
+        )
+
+    async def async_stop_capture(self) -> Path | None:
+        """Остановить запись; возвращает путь к файлу."""
+        capture, self._capture = self._capture, None
+        if capture is None:
+            return None
+        await capture.async_close()
+        return capture.path
+
+    def _record(self, kind: str, *payload: str) -> None:
+        """Событие в запись, если она включена."""
+        if self._capture is not None:
+            self._capture.record(kind, *payload)
 
     # --- Подключение ---
 
     async def connect(self) -> None:
         """Подключиться к серверу и отправить хендшейк."""
         await self._cleanup()
+        sock: socket.socket | None = None
         try:
-            self._reader, self._writer = await asyncio.wait_for(
-                asyncio.open_connection(self._host, self._port),
-                timeout=SOCKET_TIMEOUT,
-            )
+            async with asyncio.timeout(SOCKET_TIMEOUT):
+                sock = await async_open_socket(self._host, self._port)
+                loop = asyncio.get_running_loop()
+                if self._use_protocol:
+                    _, self._protocol = await loop.create_connection(
+                        DuepiProtocol, sock=sock
+                    )
+                else:
+                    self._reader, self._writer = await asyncio.open_connection(
+                        sock=sock
+                    )
         except (OSError, asyncio.TimeoutError) as err:
+            if sock is not None and self._protocol is None and self._writer is None:
+                sock.close()
+            self._record(EVENT_CONNECT_FAILED, repr(err))
             raise DuepiConnectionError(
                 f"Не удалось подключиться к {self._host}:{self._port}: {err}"
             ) from err
+        self._record(EVENT_CONNECT)
 
         # Хендшейк: "master:{deviceCode}#" (снифнуто из DP Remote app)
-        handshake = f"master:{self._device_code}#"
+        handshake = f"master:{self._device_code}#".encode("ascii")
         try:
-            self._writer.write(handshake.encode("ascii"))
-            await self._writer.drain()
+            if self._protocol is not None:
+                self._protocol.write(handshake)
+            else:
+                self._writer.write(handshake)
+                await self._writer.drain()
+            self._record(EVENT_HANDSHAKE)
         except OSError as err:
             await self._cleanup()
             raise DuepiConnectionError(f"Ошибка хендшейка: {err}") from err
@@ -108,6 +270,19 @@ class DuepiClient:
         self._connected = True
         LOGGER.debug("Подключено к %s:%s", self._host, self._port)
 
+    @property
+    def connected(self) -> bool:
+        """Есть ли открытое соединение после хендшейка."""
+        if self._protocol is not None:
+            return self._connected and self._protocol.is_open
+        return (
+            self._connected
+            and self._writer is not None
+            and not self._writer.is_closing()
+            and not self._reader.at_eof()
+            and self._reader.exception() is None
+        )
+
     async def disconnect(self) -> None:
         """Закрыть соединение."""
         await self._cleanup()
@@ -115,7 +290,12 @@ class DuepiClient:
     async def _cleanup(self) -> None:
         """Закрыть сокет."""
         self._connected = False
+        if self._protocol is not None:
+            self._record(EVENT_DISCONNECT)
+            self._protocol.close()
+            self._protocol = None
         if self._writer:
+            self._record(EVENT_DISCONNECT)
             try:
                 self._writer.close()
                 await self._writer.wait_closed()
@@ -124,9 +304,28 @@ class DuepiClient:
             self._writer = None
             self._reader = None
 
+    async def async_ensure_alive(self) -> None:
+        """Фоновая проверка: переподключиться, если реле закрыло сессию.
+
+        Keepalive/TCP_USER_TIMEOUT заставляют ядро закрыть мёртвое
+        соединение за KEEPALIVE_DEAD_AFTER сек простоя; координатор
+        вызывает проверку позже этого, и закрытие транспорта (FIN, RST
+        или ошибка keepalive) уже видно в connected. Команды не шлются;
+        lock берётся с фоновым приоритетом.
+        """
+        if not self._connected:
+            return  # Соединения ещё нет или уже закрыто намеренно
+        await self._acquire_background()
+        try:
+            if not self.connected:
+                LOGGER.debug("Соединение с реле мертво — переподключение")
+                await self.connect()
+        finally:
+            self._lock.release()
+
     async def _ensure_connected(self) -> None:
         """Переподключиться если нужно."""
-        if not self._connected or self._writer is None:
+        if not self.connected:
             await self.connect()
 
     # --- Протокол ---
@@ -146,36 +345,84 @@ class DuepiClient:
 
     async def _send_raw(self, cmd: str) -> str:
         """Отправить одну команду, получить 10-байтный ответ."""
-        if not self._writer or not self._reader:
+        if self._protocol is None and (not self._writer or not self._reader):
             raise DuepiConnectionError("Нет подключения")
 
         raw_cmd = self._build_command(cmd)
         try:
-            self._writer.write(raw_cmd)
-            await self._writer.drain()
-            response = await asyncio.wait_for(
-                self._reader.readexactly(RESPONSE_LENGTH),
-                timeout=SOCKET_TIMEOUT,
-            )
-        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as err:
+            if self._protocol is not None:
+                self._record(EVENT_REQUEST, cmd)
+                response = await self._protocol.request(raw_cmd, SOCKET_TIMEOUT)
+            else:
+                self._writer.write(raw_cmd)
+                self._record(EVENT_REQUEST, cmd)
+                await self._writer.drain()
+                response = await asyncio.wait_for(
+                    self._reader.readexactly(RESPONSE_LENGTH),
+                    timeout=SOCKET_TIMEOUT,
+                )
+        except asyncio.TimeoutError as err:
+            self._record(EVENT_TIMEOUT, cmd)
+            self._connected = False
+            raise DuepiCommandError(f"Ошибка команды {cmd}: {err}") from err
+        except (OSError, asyncio.IncompleteReadError) as err:
+            self._record(EVENT_ERROR, cmd, repr(err))
             self._connected = False
             raise DuepiCommandError(f"Ошибка команды {cmd}: {err}") from err
 
+        self._record(EVENT_REPLY, response.decode("latin-1"))
         return response.decode("ascii")
 
-    async def send_command(self, cmd: str) -> str:
-        """Отправить команду через lock (сериализация) с авто-реконнектом."""
-        async with self._lock:
-            await self._ensure_connected()
+    async def send_command(self, cmd: str, low_priority: bool = False) -> str:
+        """Отправить команду через lock (сериализация) с авто-реконнектом.
+
+        low_priority=True — фоновая команда (скан регистров): выполняется
+        только когда нет ожидающих обычных команд и идущего поллинга.
+        """
+        if low_priority:
+            await self._acquire_background()
             try:
-                result = await self._send_raw(cmd)
-            except (DuepiConnectionError, DuepiCommandError):
-                # Один ретрай с переподключением
-                LOGGER.debug("Реконнект после ошибки команды %s", cmd)
-                await self.connect()
-                result = await self._send_raw(cmd)
-            await asyncio.sleep(COMMAND_DELAY)
-            return result
+                return await self._send_locked(cmd)
+            finally:
+                self._lock.release()
+        with self._foreground():
+            async with self._lock:
+                return await self._send_locked(cmd)
+
+    async def _send_locked(self, cmd: str) -> str:
+        """Отправка под уже взятым lock."""
+        await self._ensure_connected()
+        try:
+            result = await self._send_raw(cmd)
+        except (DuepiConnectionError, DuepiCommandError):
+            # Один ретрай с переподключением
+            LOGGER.debug("Реконнект после ошибки команды %s", cmd)
+            await self.connect()
+            result = await self._send_raw(cmd)
+        await asyncio.sleep(COMMAND_DELAY)
+        return result
+
+    @contextmanager
+    def _foreground(self) -> Iterator[None]:
+        """Пометить обычную работу — фоновые команды ждут её окончания."""
+        self._foreground_count += 1
+        self._foreground_idle.clear()
+        try:
+            yield
+        finally:
+            self._foreground_count -= 1
+            if not self._foreground_count:
+                self._foreground_idle.set()
+
+    async def _acquire_background(self) -> None:
+        """Взять lock для фоновой команды, уступая обычным."""
+        while True:
+            await self._foreground_idle.wait()
+            await self._lock.acquire()
+            if self._foreground_idle.is_set():
+                return
+            # Пока ждали lock, пришла обычная команда — уступаем
+            self._lock.release()
 
     # --- Парсинг ответов ---
 
@@ -195,37 +442,16 @@ class DuepiClient:
         except (ValueError, IndexError):
             return 0
 
-    @staticmethod
-    def _get_status_text(state: int) -> str:
-        """Маппинг 32-bit статуса в текст."""
-        if state & STATE_WORKING:
-            return "Working"
-        if state & STATE_IGNITION:
-            return "Ignition"
-        if state & STATE_CLEANING:
-            return "Cleaning"
-        if state & STATE_COOLING:
-            return "Cooling"
-        if state & STATE_ECO:
-            return "Eco Standby"
-        if state & STATE_OFF or state == 0:
-            return "Off"
-        return f"Unknown (0x{state:08x})"
-
-    @staticmethod
-    def _is_stove_on(state: int) -> bool:
-        """Печь включена: горит, розжиг или чистка."""
-        return bool(state & (STATE_WORKING | STATE_IGNITION | STATE_CLEANING))
-
-    @staticmethod
-    def _is_heating(state: int) -> bool:
-        """Активно нагревает: горит или розжиг."""
-        return bool(state & (STATE_WORKING | STATE_IGNITION))
-
     # --- Публичные методы ---
 
     async def async_get_stove_data(self) -> StoveData:
         """Полный поллинг всех регистров — 8 последовательных команд."""
+        # Весь поллинг — обычная работа, фоновый скан не вклинивается
+        with self._foreground():
+            return await self._poll_stove_data()
+
+    async def _poll_stove_data(self) -> StoveData:
+        """8 команд чтения и сборка StoveData."""
         status_resp = await self.send_command(CMD_GET_STATUS)
         status_raw = self._parse_state(status_resp)
 
@@ -239,20 +465,23 @@ class DuepiClient:
 
         return StoveData(
             status_raw=status_raw,
-            status_text=self._get_status_text(status_raw),
-            is_on=self._is_stove_on(status_raw),
-            is_heating=self._is_heating(status_raw),
-            room_temp=room_raw / 10,
+            room_raw=room_raw,
             target_temp=setpoint_raw,
             fumes_temp=fumes_raw,
             power_level=power_raw,
             pellet_speed=pellet_raw,
-            fan_speed=fan_raw * 10,
+            fan_raw=fan_raw,
             alarm_code=error_raw,
-            alarm_text=ERROR_CODES.get(error_raw, f"Error {error_raw}"),
-            has_alarm=error_raw > 0,
         )
 
+    async def async_read_register(
+        self, register: str, low_priority: bool = False
+    ) -> str:
+        """Чтение произвольного регистра: команда {register}000."""
+        if register.upper() in WRITE_REGISTERS:
+            raise DuepiCommandError(f"{register}000 — команда записи, не чтение")
+        return await self.send_command(f"{register}000", low_priority=low_priority)
+
     async def async_power_on(self) -> None:
         """Включить печь."""
         await self.send_command(CMD_SET_POWER_ON)
@@ -278,13 +507,20 @@ class DuepiClient:
         """Сброс ошибки."""
         await self.send_command(CMD_RESET_ERROR)
 
-    async def async_test_connection(self) -> bool:
-        """Тест подключения — читаем статус."""
+    async def async_test_connection(self, keep_connected: bool = False) -> bool:
+        """Тест подключения — читаем статус.
+
+        keep_connected=True оставляет проверенное соединение открытым,
+        чтобы setup entry не делал повторный connect + хендшейк.
+        """
+        ok = False
         try:
             await self.connect()
             await self.send_command(CMD_GET_STATUS)
-            return True
+            ok = True
         except (DuepiConnectionError, DuepiCommandError):
-            return False
+            pass
         finally:
-            await self.disconnect()
+            if not (ok and keep_connected):
+                await self.disconnect()
+        return ok
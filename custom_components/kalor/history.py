@@ -0,0 +1,80 @@
+"""История снимков StoveData в памяти — только смены состояния.
+
+Неизменившийся поллинг новую запись не добавляет: координатор отдаёт
+тот же объект StoveData, и запись продолжает действовать. Снимки
+неизменяемы, поэтому выборки по полю и по времени ссылаются на одни
+и те же объекты, без копий.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+from itertools import islice
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import SNAPSHOT_HISTORY_SIZE
+from .duepi_client import StoveData
+
+# Сырые поля + производные свойства StoveData, доступные в выборках
+HISTORY_FIELDS: tuple[str, ...] = (
+    *StoveData.__dataclass_fields__,
+    "status_text",
+    "is_on",
+    "is_heating",
+    "room_temp",
+    "fan_speed",
+    "alarm_text",
+    "has_alarm",
+)
+
+
+class StoveHistory:
+    """Последние SNAPSHOT_HISTORY_SIZE различных снимков одной печи."""
+
+    def __init__(self, size: int = SNAPSHOT_HISTORY_SIZE) -> None:
+        """Инициализация пустой истории."""
+        # (unix_ts начала, снимок) — снимок действует до следующей записи
+        self._entries: deque[tuple[float, StoveData]] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        """Число хранимых снимков."""
+        return len(self._entries)
+
+    def record(self, ts: float, data: StoveData) -> bool:
+        """Запомнить снимок, если он отличается от последнего."""
+        if self._entries:
+            last = self._entries[-1][1]
+            if last is data or last == data:
+                return False
+        self._entries.append((ts, data))
+        return True
+
+    def snapshots(
+        self, limit: int | None = None
+    ) -> Iterator[tuple[float, StoveData]]:
+        """Записи от новых к старым, без копирования снимков."""
+        return islice(reversed(self._entries), limit)
+
+    def series(
+        self, name: str, limit: int | None = None
+    ) -> list[tuple[float, Any]]:
+        """Значения одного поля от новых к старым."""
+        if name not in HISTORY_FIELDS:
+            raise KeyError(name)
+        return [(ts, getattr(data, name)) for ts, data in self.snapshots(limit)]
+
+    def as_list(
+        self, names: list[str] | None = None, limit: int | None = None
+    ) -> list[dict[str, Any]]:
+        """Записи от новых к старым в развёрнутом виде."""
+        names = names or list(StoveData.__dataclass_fields__)
+        return [
+            {
+                "since": dt_util.utc_from_timestamp(ts).isoformat(),
+                **{name: getattr(data, name) for name in names},
+            }
+            for ts, data in self.snapshots(limit)
+        ]
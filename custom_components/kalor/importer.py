@@ -0,0 +1,81 @@
+"""Пакетный импорт печей: параллельная проверка с ограничением."""
+
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.config_entries import SOURCE_IMPORT
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+
+from .config_flow import stash_validated_client
+from .const import CONF_TRANSPORT, DATA_PENDING_CLIENTS, DOMAIN, LOGGER
+from .duepi_client import DuepiClient
+
+IMPORT_CREATED = "created"
+IMPORT_ALREADY_CONFIGURED = "already_configured"
+IMPORT_DUPLICATE = "duplicate"
+IMPORT_CANNOT_CONNECT = "cannot_connect"
+
+
+async def async_import_stoves(
+    hass: HomeAssistant,
+    device_codes: list[str],
+    host: str,
+    port: int,
+    transport: str,
+    concurrency: int,
+) -> list[dict[str, str]]:
+    """Проверить и добавить печи; результат по каждому коду в порядке ввода."""
+    configured = {entry.unique_id for entry in hass.config_entries.async_entries(DOMAIN)}
+    results: list[str | None] = []
+    to_import: dict[str, int] = {}  # device_code → индекс в results
+    for code in device_codes:
+        if code in configured:
+            results.append(IMPORT_ALREADY_CONFIGURED)
+        elif code in to_import:
+            results.append(IMPORT_DUPLICATE)
+        else:
+            to_import[code] = len(results)
+            results.append(None)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _import_one(code: str) -> str:
+        """Проверка соединения и создание записи для одной печи."""
+        async with semaphore:
+            client = DuepiClient(
+                host=host, port=port, device_code=code, transport=transport
+            )
+            if not await client.async_test_connection(keep_connected=True):
+                return IMPORT_CANNOT_CONNECT
+            stash_validated_client(hass, code, client)
+            result = await hass.config_entries.flow.async_init(
+                DOMAIN,
+                context={"source": SOURCE_IMPORT},
+                data={
+                    "device_code": code,
+                    "host": host,
+                    "port": port,
+                    CONF_TRANSPORT: transport,
+                },
+            )
+            if result["type"] is FlowResultType.CREATE_ENTRY:
+                return IMPORT_CREATED
+            # Запись не создана — соединение никто не заберёт
+            hass.data[DOMAIN][DATA_PENDING_CLIENTS].pop(code, None)
+            await client.disconnect()
+            return result.get("reason", "aborted")
+
+    outcomes = await asyncio.gather(*(_import_one(code) for code in to_import))
+    for code, outcome in zip(to_import, outcomes, strict=True):
+        results[to_import[code]] = outcome
+    LOGGER.info(
+        "Импорт печей: %s создано из %s",
+        outcomes.count(IMPORT_CREATED),
+        len(device_codes),
+    )
+    return [
+        {"device_code": code, "result": result}
+        for code, result in zip(device_codes, results, strict=True)
+    ]
@@ -0,0 +1,85 @@
+"""Накопительные метрики печи — моточасы, розжиги, ошибки, расход пеллет.
+
+Обновляются инкрементально на каждый StoveData (O(1)), без запросов
+к recorder. Переходы определяются по status_raw и alarm_code.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, fields
+from typing import Any
+
+from .const import METRICS_MAX_GAP, PELLET_KG_PER_SPEED_HOUR, STATE_IGNITION
+from .duepi_client import StoveData
+
+
+@dataclass
+class KalorMetrics:
+    """Счётчики одной печи + состояние предыдущего сэмпла."""
+
+    burn_seconds: float = 0.0  # Время в WORKING | IGNITION
+    ignition_count: int = 0  # Переходы в розжиг
+    alarm_count: int = 0  # Появления нового кода ошибки
+    pellet_integral: float = 0.0  # ∫ pellet_speed dt, единицы скорости × ч
+
+    # Предыдущий сэмпл — для детекта переходов и интегрирования
+    last_status_raw: int | None = None
+    last_alarm_code: int | None = None
+    last_heating: bool = False
+    last_pellet_speed: int = 0
+    last_ts: float | None = None
+
+    @property
+    def burn_hours(self) -> float:
+        """Моточасы горения."""
+        return self.burn_seconds / 3600
+
+    @property
+    def pellet_kg(self) -> float:
+        """Оценка расхода пеллет, кг."""
+        return self.pellet_integral * PELLET_KG_PER_SPEED_HOUR
+
+    def update(self, data: StoveData, now: float) -> bool:
+        """Учесть новый сэмпл (now — unix time, сек); True — счётчики изменились."""
+        before = self._counters()
+        if self.last_ts is not None:
+            dt = now - self.last_ts
+            # Большой разрыв (рестарт HA, потеря связи) не интегрируем
+            if 0 < dt <= METRICS_MAX_GAP and self.last_heating:
+                self.burn_seconds += dt
+                self.pellet_integral += self.last_pellet_speed * dt / 3600
+
+        if self.last_status_raw is not None:
+            if data.status_raw & STATE_IGNITION and not (
+                self.last_status_raw & STATE_IGNITION
+            ):
+                self.ignition_count += 1
+        if self.last_alarm_code is not None:
+            if data.alarm_code and data.alarm_code != self.last_alarm_code:
+                self.alarm_count += 1
+
+        self.last_status_raw = data.status_raw
+        self.last_alarm_code = data.alarm_code
+        self.last_heating = data.is_heating
+        self.last_pellet_speed = data.pellet_speed
+        self.last_ts = now
+        return self._counters() != before
+
+    def _counters(self) -> tuple[float, int, int, float]:
+        """Видимые в сенсорах значения."""
+        return (
+            self.burn_seconds,
+            self.ignition_count,
+            self.alarm_count,
+            self.pellet_integral,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Сериализация для Store."""
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> KalorMetrics:
+        """Восстановление из Store, неизвестные ключи игнорируются."""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in raw.items() if k in names})
@@ -0,0 +1,87 @@
+"""Скан сырых регистров Duepi с TTL-кэшем результатов.
+
+Чтение идёт через DuepiClient с low_priority=True — регулярный поллинг
+координатора всегда проходит первым.
+"""
+
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .const import REGISTER_CACHE_TTL, WRITE_REGISTERS
+from .duepi_client import DuepiClient, DuepiCommandError, DuepiConnectionError
+
+
+def is_write_register(register: str) -> bool:
+    """Команда {register}000 что-то меняет в печи, а не читает."""
+    return register.upper() in WRITE_REGISTERS
+
+
+def register_range(start: str, end: str) -> list[str]:
+    """Регистры от start до end включительно ("D0".."DF") без регистров записи."""
+    lo, hi = int(start, 16), int(end, 16)
+    if lo > hi:
+        lo, hi = hi, lo
+    registers = (f"{reg:02X}" for reg in range(lo, hi + 1))
+    return [reg for reg in registers if not is_write_register(reg)]
+
+
+@dataclass(slots=True)
+class _CachedRead:
+    """Ответ регистра и момент чтения (monotonic)."""
+
+    response: str
+    read_at: float
+
+
+class RegisterScanner:
+    """Пакетное чтение регистров одной печи."""
+
+    def __init__(self, client: DuepiClient) -> None:
+        """Инициализация с пустым кэшем."""
+        self._client = client
+        self._cache: dict[str, _CachedRead] = {}
+
+    async def async_scan(
+        self, registers: list[str], max_age: float = REGISTER_CACHE_TTL
+    ) -> dict[str, dict[str, Any]]:
+        """Прочитать регистры; свежие (моложе max_age) берутся из кэша."""
+        result: dict[str, dict[str, Any]] = {}
+        for register in dict.fromkeys(reg.upper() for reg in registers):
+            if is_write_register(register):
+                result[register] = {
+                    "command": f"{register}000",
+                    "error": "регистр записи, не читается",
+                }
+                continue
+            now = time.monotonic()
+            cached = self._cache.get(register)
+            if cached is not None and now - cached.read_at <= max_age:
+                result[register] = self._decode(register, cached, now, True)
+                continue
+            try:
+                response = await self._client.async_read_register(
+                    register, low_priority=True
+                )
+            except (DuepiConnectionError, DuepiCommandError) as err:
+                result[register] = {"command": f"{register}000", "error": str(err)}
+                continue
+            cached = self._cache[register] = _CachedRead(response, time.monotonic())
+            result[register] = self._decode(register, cached, cached.read_at, False)
+        return result
+
+    @staticmethod
+    def _decode(
+        register: str, cached: _CachedRead, now: float, from_cache: bool
+    ) -> dict[str, Any]:
+        """Сырой ответ + декодированные 16- и 32-битные значения."""
+        return {
+            "command": f"{register}000",
+            "raw": cached.response,
+            "value": DuepiClient._parse_value(cached.response),
+            "value32": DuepiClient._parse_state(cached.response),
+            "cached": from_cache,
+            "age": round(now - cached.read_at, 1),
+        }
@@ -0,0 +1,299 @@
+"""Недельное расписание печи — один таймер на ближайший переход.
+
+Порт идеи из TypeScript: src/hooks/use-schedule.ts
+Слоты раскладываются в отсортированный список переходов
+(минута недели, тип, slot_id). Таймер ставится только на ближайший
+переход; правки слотов пересчитывают его через bisect, без полного
+перебора расписания.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+from uuid import uuid4
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER, SCHEDULE_SAVE_DELAY, STORAGE_VERSION
+from .duepi_client import DuepiCommandError, DuepiConnectionError, StoveData
+
+if TYPE_CHECKING:
+    from .coordinator import KalorCoordinator
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Тип перехода; END < START, чтобы на одной минуте выключение
+# соседнего слота обрабатывалось раньше включения следующего
+TRANSITION_END = 0
+TRANSITION_START = 1
+_AFTER_MINUTE = TRANSITION_START + 1  # Ключ bisect «после всех переходов минуты»
+
+type Transition = tuple[int, int, str]  # (минута недели, тип, slot_id)
+
+
+def schedule_store_key(entry_id: str) -> str:
+    """Ключ Store расписания для config entry."""
+    return f"{DOMAIN}.{entry_id}.schedule"
+
+
+def week_minute(moment: datetime) -> int:
+    """Минута недели (0 = пн 00:00) в локальном времени."""
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+@dataclass(frozen=True, kw_only=True)
+class ScheduleSlot:
+    """Слот расписания: интервал одного дня недели + целевое состояние."""
+
+    slot_id: str
+    day_of_week: int  # 0=пн, 6=вс
+    start_hour: int
+    start_minute: int
+    end_hour: int
+    end_minute: int
+    target_temp: int
+    power_level: int
+    enabled: bool = True
+
+    @property
+    def start(self) -> int:
+        """Минута недели начала."""
+        return (
+            self.day_of_week * MINUTES_PER_DAY
+            + self.start_hour * 60
+            + self.start_minute
+        )
+
+    @property
+    def end(self) -> int:
+        """Минута недели конца; конец раньше начала — переход через полночь."""
+        end = (
+            self.day_of_week * MINUTES_PER_DAY + self.end_hour * 60 + self.end_minute
+        )
+        if end <= self.start:
+            end += MINUTES_PER_DAY
+        return end % MINUTES_PER_WEEK
+
+    def covers(self, minute: int) -> bool:
+        """Попадает ли минута недели в слот."""
+        offset = (minute - self.start) % MINUTES_PER_WEEK
+        return offset < (self.end - self.start) % MINUTES_PER_WEEK
+
+    def transitions(self) -> list[Transition]:
+        """Переходы слота (пустой список для выключенного)."""
+        if not self.enabled:
+            return []
+        return [
+            (self.start, TRANSITION_START, self.slot_id),
+            (self.end, TRANSITION_END, self.slot_id),
+        ]
+
+    @classmethod
+    def from_dict(cls, raw: dict[str, Any]) -> ScheduleSlot:
+        """Восстановление из Store / данных сервиса."""
+        names = {f.name for f in fields(cls)}
+        data = {k: v for k, v in raw.items() if k in names}
+        data.setdefault("slot_id", uuid4().hex)
+        return cls(**data)
+
+
+class KalorSchedule:
+    """Движок расписания одной печи."""
+
+    def __init__(self, hass: HomeAssistant, coordinator: KalorCoordinator) -> None:
+        """Инициализация пустого расписания."""
+        self._hass = hass
+        self._coordinator = coordinator
+        self._slots: dict[str, ScheduleSlot] = {}
+        self._transitions: list[Transition] = []  # Отсортирован
+        self._next_minute: int | None = None
+        self._next_fire: datetime | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self._store: Store[dict[str, Any]] = Store(
+            hass,
+            STORAGE_VERSION,
+            schedule_store_key(coordinator.config_entry.entry_id),
+        )
+
+    @property
+    def slots(self) -> list[ScheduleSlot]:
+        """Слоты в порядке начала."""
+        return sorted(self._slots.values(), key=lambda slot: slot.start)
+
+    @property
+    def next_transition(self) -> datetime | None:
+        """Время ближайшего перехода."""
+        return self._next_fire
+
+    async def async_load(self) -> None:
+        """Загрузить слоты из хранилища."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        for raw in stored.get("slots", []):
+            self._insert(ScheduleSlot.from_dict(raw))
+
+    @callback
+    def async_start(self) -> Callable[[], None]:
+        """Запустить таймер; возвращает функцию остановки."""
+        self._async_reschedule()
+        return self.async_stop
+
+    @callback
+    def async_stop(self) -> None:
+        """Снять таймер."""
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._next_minute = None
+        self._next_fire = None
+
+    # --- Правки ---
+
+    @callback
+    def async_set_slot(self, slot: ScheduleSlot) -> None:
+        """Добавить или заменить слот."""
+        self._remove(slot.slot_id)
+        self._insert(slot)
+        self._async_changed()
+
+    @callback
+    def async_remove_slot(self, slot_id: str) -> bool:
+        """Удалить слот; False если такого нет."""
+        if not self._remove(slot_id):
+            return False
+        self._async_changed()
+        return True
+
+    def _insert(self, slot: ScheduleSlot) -> None:
+        """Вставить слот и его переходы, сохраняя сортировку."""
+        self._slots[slot.slot_id] = slot
+        for transition in slot.transitions():
+            insort(self._transitions, transition)
+
+    def _remove(self, slot_id: str) -> bool:
+        """Убрать слот и его переходы."""
+        slot = self._slots.pop(slot_id, None)
+        if slot is None:
+            return False
+        for transition in slot.transitions():
+            idx = bisect_left(self._transitions, transition)
+            del self._transitions[idx]
+        return True
+
+    @callback
+    def _async_changed(self) -> None:
+        """После правки: пересчитать ближайший переход и сохранить."""
+        self._async_reschedule()
+        self._store.async_delay_save(self._data_to_store, SCHEDULE_SAVE_DELAY)
+
+    def _data_to_store(self) -> dict[str, Any]:
+        """Снимок для записи на диск."""
+        return {"slots": [asdict(slot) for slot in self._slots.values()]}
+
+    # --- Таймер ---
+
+    @callback
+    def _async_reschedule(self) -> None:
+        """Поставить таймер на ближайший переход строго после текущей минуты."""
+        now = dt_util.now()
+        current = week_minute(now)
+        if not self._transitions:
+            self.async_stop()
+            return
+
+        idx = bisect_right(self._transitions, (current, _AFTER_MINUTE))
+        minute = self._transitions[idx % len(self._transitions)][0]
+        if minute == self._next_minute and self._unsub_timer:
+            return  # Ближайший переход не изменился
+
+        delta = (minute - current) % MINUTES_PER_WEEK or MINUTES_PER_WEEK
+        fire_at = now.replace(second=0, microsecond=0) + timedelta(minutes=delta)
+        if self._unsub_timer:
+            self._unsub_timer()
+        self._next_minute = minute
+        self._next_fire = fire_at
+        self._unsub_timer = async_track_point_in_time(
+            self._hass, self._async_fire, fire_at
+        )
+
+    async def _async_fire(self, _now: datetime) -> None:
+        """Обработать все переходы ближайшей минуты."""
+        self._unsub_timer = None
+        minute = self._next_minute
+        self._next_minute = None
+        if minute is not None:
+            lo = bisect_left(self._transitions, (minute,))
+            hi = bisect_right(self._transitions, (minute, _AFTER_MINUTE))
+            batch = self._transitions[lo:hi]
+            try:
+                await self._async_apply(minute, batch)
+            except (DuepiConnectionError, DuepiCommandError) as err:
+                LOGGER.warning("Ошибка применения расписания: %s", err)
+        self._async_reschedule()
+
+    async def _async_apply(self, minute: int, batch: list[Transition]) -> None:
+        """Довести печь до состояния, требуемого расписанием."""
+        starts = [
+            self._slots[slot_id]
+            for _, kind, slot_id in batch
+            if kind == TRANSITION_START
+        ]
+        if starts:
+            await self._async_apply_slot(starts[-1])
+            return
+        # Конец слота: если действует другой слот — переходим на него
+        active = next(
+            (
+                slot
+                for slot in self._slots.values()
+                if slot.enabled and slot.covers(minute)
+            ),
+            None,
+        )
+        if active is not None:
+            await self._async_apply_slot(active)
+            return
+
+        data = self._current_data()
+        client = self._coordinator.client
+        if data is None or data.is_on:
+            LOGGER.debug("Расписание: выключение печи")
+            await client.async_power_off()
+            await self._coordinator.async_request_refresh()
+
+    async def _async_apply_slot(self, slot: ScheduleSlot) -> None:
+        """Включить печь с параметрами слота, пропуская совпадающие записи."""
+        data = self._current_data()
+        client = self._coordinator.client
+        changed = False
+        if data is None or not data.is_on:
+            await client.async_power_on()
+            changed = True
+        if data is None or data.target_temp != slot.target_temp:
+            await client.async_set_target_temp(slot.target_temp)
+            changed = True
+        if data is None or data.power_level != slot.power_level:
+            await client.async_set_power_level(slot.power_level)
+            changed = True
+        if changed:
+            LOGGER.debug("Расписание: применён слот %s", slot.slot_id)
+            await self._coordinator.async_request_refresh()
+
+    def _current_data(self) -> StoveData | None:
+        """Живой снимок печи; восстановленный из Store не в счёт.
+
+        Снимок из Store мог устареть, пока HA был выключен: по нему
+        нельзя решать, что запись уже не нужна.
+        """
+        if self._coordinator.data_restored:
+            return None
+        return self._coordinator.data
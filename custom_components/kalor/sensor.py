@@ -11,13 +11,19 @@ from homeassistant.components.sensor import (
     SensorEntityDescription,
     SensorStateClass,
 )
-from homeassistant.const import REVOLUTIONS_PER_MINUTE, UnitOfTemperature
+from homeassistant.const import (
+    REVOLUTIONS_PER_MINUTE,
+    UnitOfMass,
+    UnitOfTemperature,
+    UnitOfTime,
+)
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from .coordinator import KalorConfigEntry, KalorCoordinator
 from .duepi_client import StoveData
 from .entity import KalorEntity
+from .metrics import KalorMetrics
 
 
 @dataclass(frozen=True, kw_only=True)
@@ -74,6 +80,47 @@ SENSOR_DESCRIPTIONS: tuple[KalorSensorDescription, ...] = (
 )
 
 
+@dataclass(frozen=True, kw_only=True)
+class KalorMetricSensorDescription(SensorEntityDescription):
+    """Описание сенсора накопительной метрики."""
+
+    value_fn: Callable[[KalorMetrics], float | int]
+
+
+METRIC_SENSOR_DESCRIPTIONS: tuple[KalorMetricSensorDescription, ...] = (
+    KalorMetricSensorDescription(
+        key="burn_hours",
+        translation_key="burn_hours",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfTime.HOURS,
+        suggested_display_precision=1,
+        value_fn=lambda metrics: metrics.burn_hours,
+    ),
+    KalorMetricSensorDescription(
+        key="ignition_count",
+        translation_key="ignition_count",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.ignition_count,
+    ),
+    KalorMetricSensorDescription(
+        key="alarm_count",
+        translation_key="alarm_count",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.alarm_count,
+    ),
+    KalorMetricSensorDescription(
+        key="pellet_consumption",
+        translation_key="pellet_consumption",
+        device_class=SensorDeviceClass.WEIGHT,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfMass.KILOGRAMS,
+        suggested_display_precision=2,
+        value_fn=lambda metrics: metrics.pellet_kg,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     entry: KalorConfigEntry,
@@ -84,6 +131,10 @@ async def async_setup_entry(
     async_add_entities(
         KalorSensor(coordinator, desc) for desc in SENSOR_DESCRIPTIONS
     )
+    async_add_entities(
+        KalorMetricSensor(coordinator, desc)
+        for desc in METRIC_SENSOR_DESCRIPTIONS
+    )
 
 
 class KalorSensor(KalorEntity, SensorEntity):
@@ -109,3 +160,33 @@ class KalorSensor(KalorEntity, SensorEntity):
         if self.coordinator.data is None:
             return None
         return self.entity_description.value_fn(self.coordinator.data)
+
+
+class KalorMetricSensor(KalorEntity, SensorEntity):
+    """Сенсор накопительной метрики Kalor."""
+
+    entity_description: KalorMetricSensorDescription
+
+    def __init__(
+        self,
+        coordinator: KalorCoordinator,
+        description: KalorMetricSensorDescription,
+    ) -> None:
+        """Инициализация сенсора метрики."""
+        super().__init__(coordinator)
+        self.entity_description = description
+        self._attr_unique_id = (
+            f"{coordinator.config_entry.unique_id}-{description.key}"
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Подписаться и на обновления метрик при неизменном StoveData."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_metrics_listener(self.async_write_ha_state)
+        )
+
+    @property
+    def native_value(self) -> float | int:
+        """Значение счётчика из метрик координатора."""
+        return self.entity_description.value_fn(self.coordinator.metrics)
@@ -0,0 +1,356 @@
+"""Сервисы интеграции Kalor."""
+
+from __future__ import annotations
+
+from dataclasses import asdict
+from pathlib import Path
+from uuid import uuid4
+
+import voluptuous as vol
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ALARM_HISTORY_SIZE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DAY_OF_WEEK,
+    ATTR_DEVICE_CODES,
+    ATTR_ENABLED,
+    ATTR_FIELDS,
+    ATTR_END_TIME,
+    ATTR_HOST,
+    ATTR_LIMIT,
+    ATTR_MAX_AGE,
+    ATTR_MAX_CONCURRENCY,
+    ATTR_PORT,
+    ATTR_POWER_LEVEL,
+    ATTR_RANGE_END,
+    ATTR_RANGE_START,
+    ATTR_REGISTERS,
+    ATTR_SLOT_ID,
+    ATTR_START_TIME,
+    ATTR_TARGET_TEMPERATURE,
+    CONF_TRANSPORT,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    IMPORT_CONCURRENCY,
+    IMPORT_MAX_CONCURRENCY,
+    MAX_POWER,
+    MAX_TEMP,
+    MIN_POWER,
+    MIN_TEMP,
+    REGISTER_CACHE_TTL,
+    REGISTER_SCAN_MAX,
+    SNAPSHOT_HISTORY_SIZE,
+    SERVICE_GET_ALARM_HISTORY,
+    SERVICE_GET_SCHEDULE,
+    SERVICE_GET_STOVE_HISTORY,
+    SERVICE_IMPORT_STOVES,
+    SERVICE_REMOVE_SCHEDULE_SLOT,
+    SERVICE_SCAN_REGISTERS,
+    SERVICE_START_CAPTURE,
+    SERVICE_STOP_CAPTURE,
+    SERVICE_SET_SCHEDULE_SLOT,
+    TRANSPORT_PROTOCOL,
+    TRANSPORT_STREAM,
+)
+from .coordinator import KalorConfigEntry
+from .history import HISTORY_FIELDS
+from .importer import async_import_stoves
+from .registers import is_write_register, register_range
+from .schedule import ScheduleSlot
+
+HEX_CODE = vol.Match(r"^[0-9A-Fa-f]{2}$", msg="регистр — 2 hex-символа")
+
+
+def _read_register(value: str) -> str:
+    """Запретить коды, для которых {reg}000 — команда записи."""
+    if is_write_register(value):
+        raise vol.Invalid(f"{value}: регистр записи (F0–FF, D6), не сканируется")
+    return value
+
+
+# Явно заданный регистр; границы диапазона — HEX_CODE, регистры
+# записи внутри диапазона register_range пропускает сам
+REGISTER_CODE = vol.All(HEX_CODE, vol.Upper, _read_register)
+
+GET_ALARM_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=ALARM_HISTORY_SIZE)
+        ),
+    }
+)
+
+GET_STOVE_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_FIELDS): vol.All(cv.ensure_list, [vol.In(HISTORY_FIELDS)]),
+        vol.Optional(ATTR_LIMIT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=SNAPSHOT_HISTORY_SIZE)
+        ),
+    }
+)
+
+ENTRY_SCHEMA = vol.Schema({vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string})
+
+SET_SCHEDULE_SLOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_SLOT_ID): cv.string,
+        vol.Required(ATTR_DAY_OF_WEEK): vol.All(
+            vol.Coerce(int), vol.Range(min=0, max=6)
+        ),
+        vol.Required(ATTR_START_TIME): cv.time,
+        vol.Required(ATTR_END_TIME): cv.time,
+        vol.Required(ATTR_TARGET_TEMPERATURE): vol.All(
+            vol.Coerce(int), vol.Range(min=MIN_TEMP, max=MAX_TEMP)
+        ),
+        vol.Required(ATTR_POWER_LEVEL): vol.All(
+            vol.Coerce(int), vol.Range(min=MIN_POWER, max=MAX_POWER)
+        ),
+        vol.Optional(ATTR_ENABLED, default=True): cv.boolean,
+    }
+)
+
+REMOVE_SCHEDULE_SLOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_SLOT_ID): cv.string,
+    }
+)
+
+SCAN_REGISTERS_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+            # Без default: иначе has_at_least_one_key ниже всегда проходит
+            vol.Optional(ATTR_REGISTERS): vol.All(
+                cv.ensure_list, [REGISTER_CODE], vol.Length(min=1)
+            ),
+            vol.Inclusive(ATTR_RANGE_START, "range"): HEX_CODE,
+            vol.Inclusive(ATTR_RANGE_END, "range"): HEX_CODE,
+            vol.Optional(ATTR_MAX_AGE, default=REGISTER_CACHE_TTL): vol.All(
+                vol.Coerce(float), vol.Range(min=0)
+            ),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_REGISTERS, ATTR_RANGE_START),
+)
+
+IMPORT_STOVES_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_DEVICE_CODES): vol.All(
+            cv.ensure_list, [cv.string], vol.Length(min=1)
+        ),
+        vol.Optional(ATTR_HOST, default=DEFAULT_HOST): cv.string,
+        vol.Optional(ATTR_PORT, default=DEFAULT_PORT): cv.port,
+        vol.Optional(CONF_TRANSPORT, default=DEFAULT_TRANSPORT): vol.In(
+            [TRANSPORT_STREAM, TRANSPORT_PROTOCOL]
+        ),
+        vol.Optional(ATTR_MAX_CONCURRENCY, default=IMPORT_CONCURRENCY): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=IMPORT_MAX_CONCURRENCY)
+        ),
+    }
+)
+
+
+def _get_entry(hass: HomeAssistant, call: ServiceCall) -> KalorConfigEntry:
+    """Загруженный config entry Kalor из данных вызова."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    entry: KalorConfigEntry | None = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.domain != DOMAIN:
+        raise ServiceValidationError(f"Неизвестный config entry: {entry_id}")
+    if entry.state is not ConfigEntryState.LOADED:
+        raise ServiceValidationError(f"Config entry не загружен: {entry_id}")
+    return entry
+
+
+async def _async_get_alarm_history(call: ServiceCall) -> ServiceResponse:
+    """История переходов alarm_code, от новых к старым."""
+    entry = _get_entry(call.hass, call)
+    history = entry.runtime_data.alarm_history
+    return {"alarms": history.as_list(call.data.get(ATTR_LIMIT))}
+
+
+async def _async_get_stove_history(call: ServiceCall) -> ServiceResponse:
+    """Смены снимка печи с запуска HA, от новых к старым."""
+    history = _get_entry(call.hass, call).runtime_data.history
+    return {
+        "snapshots": history.as_list(
+            call.data.get(ATTR_FIELDS), call.data.get(ATTR_LIMIT)
+        )
+    }
+
+
+async def _async_get_schedule(call: ServiceCall) -> ServiceResponse:
+    """Слоты расписания и время ближайшего перехода."""
+    schedule = _get_entry(call.hass, call).runtime_data.schedule
+    next_transition = schedule.next_transition
+    return {
+        "slots": [asdict(slot) for slot in schedule.slots],
+        "next_transition": next_transition.isoformat() if next_transition else None,
+    }
+
+
+async def _async_set_schedule_slot(call: ServiceCall) -> ServiceResponse:
+    """Добавить или заменить слот расписания."""
+    schedule = _get_entry(call.hass, call).runtime_data.schedule
+    start = call.data[ATTR_START_TIME]
+    end = call.data[ATTR_END_TIME]
+    slot = ScheduleSlot(
+        slot_id=call.data.get(ATTR_SLOT_ID) or uuid4().hex,
+        day_of_week=call.data[ATTR_DAY_OF_WEEK],
+        start_hour=start.hour,
+        start_minute=start.minute,
+        end_hour=end.hour,
+        end_minute=end.minute,
+        target_temp=call.data[ATTR_TARGET_TEMPERATURE],
+        power_level=call.data[ATTR_POWER_LEVEL],
+        enabled=call.data[ATTR_ENABLED],
+    )
+    schedule.async_set_slot(slot)
+    return {ATTR_SLOT_ID: slot.slot_id}
+
+
+async def _async_remove_schedule_slot(call: ServiceCall) -> None:
+    """Удалить слот расписания."""
+    schedule = _get_entry(call.hass, call).runtime_data.schedule
+    slot_id = call.data[ATTR_SLOT_ID]
+    if not schedule.async_remove_slot(slot_id):
+        raise ServiceValidationError(f"Неизвестный слот расписания: {slot_id}")
+
+
+async def _async_scan_registers(call: ServiceCall) -> ServiceResponse:
+    """Пакетное чтение регистров с фоновым приоритетом."""
+    coordinator = _get_entry(call.hass, call).runtime_data
+    registers = list(call.data.get(ATTR_REGISTERS, []))
+    if ATTR_RANGE_START in call.data:
+        registers += register_range(
+            call.data[ATTR_RANGE_START], call.data[ATTR_RANGE_END]
+        )
+    if len(registers) > REGISTER_SCAN_MAX:
+        raise ServiceValidationError(
+            f"Слишком много регистров: {len(registers)} > {REGISTER_SCAN_MAX}"
+        )
+    return {
+        "registers": await coordinator.registers.async_scan(
+            registers, call.data[ATTR_MAX_AGE]
+        )
+    }
+
+
+async def _async_start_capture(call: ServiceCall) -> ServiceResponse:
+    """Включить запись трафика печи в файл в каталоге конфигурации HA."""
+    entry = _get_entry(call.hass, call)
+    stamp = dt_util.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = Path(
+        call.hass.config.path(
+            f"{DOMAIN}_capture_{entry.data['device_code'][:6]}_{stamp}.jsonl"
+        )
+    )
+    try:
+        entry.runtime_data.client.start_capture(path)
+    except RuntimeError as err:
+        raise ServiceValidationError(str(err)) from err
+    return {"path": str(path)}
+
+
+async def _async_stop_capture(call: ServiceCall) -> ServiceResponse:
+    """Остановить запись трафика."""
+    client = _get_entry(call.hass, call).runtime_data.client
+    path = await client.async_stop_capture()
+    return {"path": str(path) if path else None}
+
+
+async def _async_import_stoves(call: ServiceCall) -> ServiceResponse:
+    """Пакетно проверить и добавить печи по списку device code."""
+    results = await async_import_stoves(
+        call.hass,
+        [code.strip() for code in call.data[ATTR_DEVICE_CODES] if code.strip()],
+        call.data[ATTR_HOST],
+        call.data[ATTR_PORT],
+        call.data[CONF_TRANSPORT],
+        call.data[ATTR_MAX_CONCURRENCY],
+    )
+    return {"results": results}
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Регистрация сервисов Kalor."""
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_ALARM_HISTORY,
+        _async_get_alarm_history,
+        schema=GET_ALARM_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_STOVE_HISTORY,
+        _async_get_stove_history,
+        schema=GET_STOVE_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE,
+        _async_get_schedule,
+        schema=ENTRY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_SCHEDULE_SLOT,
+        _async_set_schedule_slot,
+        schema=SET_SCHEDULE_SLOT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_SCHEDULE_SLOT,
+        _async_remove_schedule_slot,
+        schema=REMOVE_SCHEDULE_SLOT_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SCAN_REGISTERS,
+        _async_scan_registers,
+        schema=SCAN_REGISTERS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_START_CAPTURE,
+        _async_start_capture,
+        schema=ENTRY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_STOP_CAPTURE,
+        _async_stop_capture,
+        schema=ENTRY_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STOVES,
+        _async_import_stoves,
+        schema=IMPORT_STOVES_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
@@ -0,0 +1,153 @@
+"""Низкоуровневый транспорт Duepi на asyncio.BufferedProtocol.
+
+Альтернатива StreamReader/StreamWriter + wait_for: один
+предвыделенный буфер приёма на соединение, FIFO ожидающих ответ
+futures и общий на весь event loop таймер таймаутов вместо задачи
+wait_for на каждую команду.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from weakref import WeakSet
+
+from .const import RESPONSE_LENGTH, SOCKET_TIMEOUT
+
+RECEIVE_BUFFER_SIZE = 256  # Байт на соединение
+TIMEOUT_RESOLUTION = 0.25  # сек, шаг общего таймера таймаутов
+
+
+class _TimeoutSweeper:
+    """Один call_later на loop: просматривает головы FIFO всех протоколов."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._protocols: WeakSet[DuepiProtocol] = WeakSet()
+        self._handle: asyncio.TimerHandle | None = None
+
+    def watch(self, protocol: DuepiProtocol) -> None:
+        """Протокол ждёт ответов — включить его в обход."""
+        self._protocols.add(protocol)
+        if self._handle is None:
+            self._handle = self._loop.call_later(TIMEOUT_RESOLUTION, self._sweep)
+
+    def _sweep(self) -> None:
+        """Просрочить ответы с истёкшим дедлайном."""
+        now = time.monotonic()
+        for protocol in list(self._protocols):
+            if not protocol.expire(now):
+                self._protocols.discard(protocol)
+        self._handle = (
+            self._loop.call_later(TIMEOUT_RESOLUTION, self._sweep)
+            if self._protocols
+            else None
+        )
+
+
+_sweepers: dict[asyncio.AbstractEventLoop, _TimeoutSweeper] = {}
+
+
+def _get_sweeper(loop: asyncio.AbstractEventLoop) -> _TimeoutSweeper:
+    """Общий таймер для event loop."""
+    sweeper = _sweepers.get(loop)
+    if sweeper is None:
+        if loop.is_closed():
+            raise RuntimeError("Event loop закрыт")
+        # Сбросить таймеры закрытых loop (тесты, soak-прогоны)
+        for stale in [lp for lp in _sweepers if lp.is_closed()]:
+            del _sweepers[stale]
+        sweeper = _sweepers[loop] = _TimeoutSweeper(loop)
+    return sweeper
+
+
+class DuepiProtocol(asyncio.BufferedProtocol):
+    """Соединение с реле: запрос → 10-байтный ответ, строго по порядку."""
+
+    def __init__(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._transport: asyncio.Transport | None = None
+        self._buffer = bytearray(RECEIVE_BUFFER_SIZE)
+        self._view = memoryview(self._buffer)
+        self._filled = 0
+        # (future, дедлайн monotonic) — ответы приходят в порядке запросов
+        self._pending: deque[tuple[asyncio.Future[bytes], float]] = deque()
+        self._lost: Exception | None = None
+
+    # --- asyncio.BufferedProtocol ---
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        """Соединение установлено."""
+        assert isinstance(transport, asyncio.Transport)
+        self._transport = transport
+
+    def get_buffer(self, sizehint: int) -> memoryview:
+        """Свободный хвост общего буфера."""
+        return self._view[self._filled :]
+
+    def buffer_updated(self, nbytes: int) -> None:
+        """Разобрать все полные ответы из буфера."""
+        self._filled += nbytes
+        consumed = 0
+        while self._filled - consumed >= RESPONSE_LENGTH:
+            end = consumed + RESPONSE_LENGTH
+            reply = bytes(self._view[consumed:end])
+            consumed = end
+            if not self._pending:
+                continue  # Ответ без запроса (после таймаута) — отбрасываем
+            future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_result(reply)
+        if consumed:
+            rest = self._filled - consumed
+            self._buffer[:rest] = bytes(self._view[consumed : self._filled])
+            self._filled = rest
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        """Провалить все ожидающие ответы."""
+        self._lost = exc or ConnectionResetError("Соединение закрыто реле")
+        self._transport = None
+        while self._pending:
+            future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(ConnectionResetError(str(self._lost)))
+
+    # --- API ---
+
+    @property
+    def is_open(self) -> bool:
+        """Транспорт жив."""
+        return self._transport is not None and not self._transport.is_closing()
+
+    def write(self, data: bytes) -> None:
+        """Отправка без ожидания ответа (хендшейк)."""
+        if self._transport is None:
+            raise ConnectionResetError(str(self._lost))
+        self._transport.write(data)
+
+    async def request(self, data: bytes, timeout: float = SOCKET_TIMEOUT) -> bytes:
+        """Отправить команду и дождаться её ответа."""
+        self.write(data)
+        future: asyncio.Future[bytes] = self._loop.create_future()
+        self._pending.append((future, time.monotonic() + timeout))
+        _get_sweeper(self._loop).watch(self)
+        return await future
+
+    def expire(self, now: float) -> bool:
+        """Просрочить ответы; False — ждать больше нечего."""
+        expired = False
+        while self._pending and self._pending[0][1] <= now:
+            future, _ = self._pending.popleft()
+            if not future.done():
+                future.set_exception(TimeoutError())
+            expired = True
+        if expired and self._transport is not None:
+            # Поздний ответ сдвинет FIFO — соединение больше не годится
+            self._transport.close()
+        return bool(self._pending)
+
+    def close(self) -> None:
+        """Закрыть соединение."""
+        if self._transport is not None:
+            self._transport.close()
@@ -0,0 +1,71 @@
+"""Общие фикстуры тестов Kalor."""
+
+from __future__ import annotations
+
+from collections.abc import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.kalor.const import STATE_OFF, STATE_WORKING
+from custom_components.kalor.duepi_client import StoveData
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Разрешить загрузку custom_components/kalor."""
+
+
+def make_stove_data(
+    *,
+    status_raw: int = STATE_WORKING,
+    room_raw: int = 215,
+    target_temp: int = 22,
+    fumes_temp: int = 140,
+    power_level: int = 3,
+    pellet_speed: int = 28,
+    fan_raw: int = 140,
+    alarm_code: int = 0,
+) -> StoveData:
+    """StoveData горящей печи из сырых значений регистров."""
+    return StoveData(
+        status_raw=status_raw,
+        room_raw=room_raw,
+        target_temp=target_temp,
+        fumes_temp=fumes_temp,
+        power_level=power_level,
+        pellet_speed=pellet_speed,
+        fan_raw=fan_raw,
+        alarm_code=alarm_code,
+    )
+
+
+def make_off_data(**overrides: int) -> StoveData:
+    """StoveData выключенной печи."""
+    return make_stove_data(**{"status_raw": STATE_OFF, "pellet_speed": 0, **overrides})
+
+
+def make_client_mock() -> MagicMock:
+    """DuepiClient без сети: подключён, поллинг отдаёт горящую печь."""
+    client = MagicMock()
+    client.connected = True
+    client.connect = AsyncMock()
+    client.disconnect = AsyncMock()
+    client.async_test_connection = AsyncMock(return_value=True)
+    client.async_get_stove_data = AsyncMock(return_value=make_stove_data())
+    client.async_power_on = AsyncMock()
+    client.async_power_off = AsyncMock()
+    client.async_set_target_temp = AsyncMock()
+    client.async_set_power_level = AsyncMock()
+    client.async_read_register = AsyncMock(return_value="\x1b00D70000&")
+    client.async_stop_capture = AsyncMock(return_value=None)
+    client.async_ensure_alive = AsyncMock()
+    return client
+
+
+@pytest.fixture
+def mock_client() -> Generator[MagicMock]:
+    """Клиент, который получит async_setup_entry."""
+    client = make_client_mock()
+    with patch("custom_components.kalor.DuepiClient", return_value=client):
+        yield client
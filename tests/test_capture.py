@@ -0,0 +1,157 @@
+"""Тесты записи трафика и её воспроизведения через tools/kalor_replay."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+from pathlib import Path
+import subprocess
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.kalor.capture import (
+    CAPTURE_FLUSH_EVERY,
+    EVENT_CONNECT,
+    EVENT_CONNECT_FAILED,
+    EVENT_DISCONNECT,
+    EVENT_HANDSHAKE,
+    EVENT_REPLY,
+    EVENT_REQUEST,
+    DuepiCapture,
+    load_capture,
+    split_sessions,
+)
+from custom_components.kalor.const import TRANSPORT_PROTOCOL, TRANSPORT_STREAM
+from custom_components.kalor.duepi_client import DuepiClient
+from custom_components.kalor.transport import TIMEOUT_RESOLUTION
+from tools.kalor_replay import ReplayServer
+
+COMMAND_LENGTH = 10
+
+
+@pytest.fixture(autouse=True)
+def no_protocol_delays() -> Generator[None]:
+    """Без пауз после хендшейка и между командами."""
+    with (
+        patch("custom_components.kalor.duepi_client.COMMAND_DELAY", 0),
+        patch("custom_components.kalor.duepi_client.HANDSHAKE_DELAY", 0),
+    ):
+        yield
+
+
+def _reply(frame: bytes) -> bytes:
+    """Ответ фейкового реле: код регистра в значении, D1000 → 0x00D1."""
+    return b"\x1b00" + frame[2:4] + b"0000&"
+
+
+async def _relay(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    """Реле: хендшейк, затем ответ на каждую команду."""
+    try:
+        await reader.readuntil(b"#")
+        while True:
+            frame = await reader.readexactly(COMMAND_LENGTH)
+            writer.write(_reply(frame))
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        pass
+    finally:
+        writer.close()
+
+
+async def test_flush_preserves_order(tmp_path: Path) -> None:
+    """Фоновые сбросы буфера не теряют и не переставляют события."""
+    path = tmp_path / "capture.jsonl"
+    capture = DuepiCapture(path, {"device": "abc123"})
+    for idx in range(CAPTURE_FLUSH_EVERY * 2 + 5):
+        capture.record(EVENT_REQUEST, f"D{idx % 10}000")
+        await asyncio.sleep(0)
+    await capture.async_close()
+
+    header, events = load_capture(path)
+    assert header["device"] == "abc123"
+    assert len(events) == CAPTURE_FLUSH_EVERY * 2 + 5
+    assert [event[2] for event in events[:3]] == ["D0000", "D1000", "D2000"]
+    assert [event[0] for event in events] == sorted(event[0] for event in events)
+
+
+def test_unsupported_version_is_rejected(tmp_path: Path) -> None:
+    """Запись чужой версии формата не читается."""
+    path = tmp_path / "capture.jsonl"
+    path.write_text('{"v":99}\n')
+    with pytest.raises(ValueError):
+        load_capture(path)
+
+
+def test_replay_tool_does_not_import_home_assistant() -> None:
+    """tools/kalor_replay запускается без Home Assistant и пакета интеграции."""
+    code = (
+        "import sys, tools.kalor_replay; "
+        "print(sorted(m for m in sys.modules "
+        "if m.split('.')[0] in ('homeassistant', 'custom_components')))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_split_sessions() -> None:
+    """Сессии режутся по соединению, неудачные подключения выбрасываются."""
+    events = [
+        [0, EVENT_REQUEST, "D1000"],
+        [1, EVENT_REPLY, "\x1b00D10000&"],
+        [2, EVENT_CONNECT_FAILED, "OSError()"],
+        [3, EVENT_CONNECT],
+        [4, EVENT_HANDSHAKE],
+    ]
+    assert list(split_sessions(events)) == [events[:2], events[3:]]
+
+
+@pytest.mark.usefixtures("socket_enabled")
+@pytest.mark.parametrize("transport", [TRANSPORT_STREAM, TRANSPORT_PROTOCOL])
+async def test_capture_replays_identically(tmp_path: Path, transport: str) -> None:
+    """Записанная сессия, проигранная ReplayServer, даёт клиенту те же ответы."""
+    relay = await asyncio.start_server(_relay, "127.0.0.1", 0)
+    port = relay.sockets[0].getsockname()[1]
+    client = DuepiClient("127.0.0.1", port, "abc123", transport)
+    client.start_capture(tmp_path / "capture.jsonl")
+    async with relay:
+        live = [await client.async_read_register(reg) for reg in ("D1", "C6")]
+        await client.disconnect()
+    path = await client.async_stop_capture()
+
+    header, events = load_capture(path)
+    assert (header["port"], header["connected"]) == (port, False)
+    assert [event[1] for event in events] == [
+        EVENT_CONNECT,
+        EVENT_HANDSHAKE,
+        EVENT_REQUEST,
+        EVENT_REPLY,
+        EVENT_REQUEST,
+        EVENT_REPLY,
+        EVENT_DISCONNECT,
+    ]
+
+    replay = ReplayServer(list(split_sessions(events)), time_scale=0)
+    server = await asyncio.start_server(replay.handle, "127.0.0.1", 0)
+    client = DuepiClient(
+        "127.0.0.1", server.sockets[0].getsockname()[1], "abc123", transport
+    )
+    async with server:
+        replayed = [await client.async_read_register(reg) for reg in ("D1", "C6")]
+        await client.disconnect()
+        await asyncio.wait_for(replay.done.wait(), 1)
+    # Общий таймер протокола снимается на следующем обходе
+    await asyncio.sleep(TIMEOUT_RESOLUTION * 2)
+
+    assert replayed == live == ["\x1b00D10000&", "\x1b00C60000&"]
+    assert (replay.stats.requests, replay.stats.replies) == (2, 2)
+    assert not replay.stats.desyncs
@@ -0,0 +1,157 @@
+"""Тесты установки соединения: кэш DNS, опции сокета, проверка живости."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, Generator
+import socket
+import struct
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from custom_components.kalor import connection
+from custom_components.kalor.connection import (
+    async_open_socket,
+    async_resolve,
+    invalidate_dns,
+    tune_socket,
+)
+from custom_components.kalor.const import (
+    DNS_CACHE_TTL,
+    HANDSHAKE_DELAY,
+    KEEPALIVE_COUNT,
+    KEEPALIVE_DEAD_AFTER,
+    KEEPALIVE_IDLE,
+    KEEPALIVE_INTERVAL,
+    LIVENESS_DELAY,
+    SCAN_INTERVAL,
+    SOCKET_TIMEOUT,
+    TCP_USER_TIMEOUT_MS,
+)
+from custom_components.kalor.duepi_client import DuepiClient
+
+ADDRINFO = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", 3000))]
+
+
+@pytest.fixture(autouse=True)
+def clear_dns_cache() -> Generator[None]:
+    """Каждый тест начинает с пустого кэша адресов."""
+    connection._dns_cache.clear()
+    yield
+    connection._dns_cache.clear()
+
+
+@pytest.fixture
+async def getaddrinfo() -> AsyncGenerator[AsyncMock]:
+    """getaddrinfo event loop без настоящего резолвера."""
+    mock = AsyncMock(return_value=ADDRINFO)
+    with patch.object(asyncio.get_running_loop(), "getaddrinfo", mock):
+        yield mock
+
+
+async def test_resolve_is_cached_for_ttl(getaddrinfo: AsyncMock) -> None:
+    """Повторный резолв в пределах DNS_CACHE_TTL не ходит в getaddrinfo."""
+    with patch.object(connection.time, "monotonic", return_value=1000):
+        assert await async_resolve("relay.local", 3000) == ADDRINFO
+        assert await async_resolve("relay.local", 3000) == ADDRINFO
+    assert getaddrinfo.await_count == 1
+
+    with patch.object(
+        connection.time, "monotonic", return_value=1000 + DNS_CACHE_TTL + 1
+    ):
+        await async_resolve("relay.local", 3000)
+    assert getaddrinfo.await_count == 2
+
+
+async def test_invalidate_forgets_addresses(getaddrinfo: AsyncMock) -> None:
+    """После invalidate_dns адреса резолвятся заново."""
+    await async_resolve("relay.local", 3000)
+    invalidate_dns("relay.local", 3000)
+    await async_resolve("relay.local", 3000)
+    assert getaddrinfo.await_count == 2
+
+
+async def test_failed_dial_invalidates_cache(getaddrinfo: AsyncMock) -> None:
+    """Неудачное подключение сбрасывает кэш — реле могло сменить адрес."""
+    with (
+        patch.object(connection, "start_connection", side_effect=OSError("refused")),
+        pytest.raises(OSError),
+    ):
+        await async_open_socket("relay.local", 3000)
+    assert ("relay.local", 3000) not in connection._dns_cache
+
+
+@pytest.mark.usefixtures("socket_enabled")
+def test_tune_socket_sets_options() -> None:
+    """NODELAY, keepalive и таймеры keepalive выставлены."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        tune_socket(sock)
+        assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+        assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            assert (
+                sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE)
+                == KEEPALIVE_IDLE
+            )
+            assert (
+                sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL)
+                == KEEPALIVE_INTERVAL
+            )
+            assert (
+                sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT)
+                == KEEPALIVE_COUNT
+            )
+        if hasattr(socket, "TCP_USER_TIMEOUT"):
+            assert (
+                sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_USER_TIMEOUT)
+                == TCP_USER_TIMEOUT_MS
+            )
+
+
+def test_liveness_check_follows_keepalive() -> None:
+    """Проверка живости идёт после обнаружения ядром и до следующего поллинга."""
+    assert TCP_USER_TIMEOUT_MS >= KEEPALIVE_DEAD_AFTER * 1000
+    assert LIVENESS_DELAY > KEEPALIVE_DEAD_AFTER
+    # Переподключение (подключение + хендшейк) укладывается до поллинга
+    reconnect_by = LIVENESS_DELAY + SOCKET_TIMEOUT + HANDSHAKE_DELAY
+    assert reconnect_by <= SCAN_INTERVAL.total_seconds()
+
+
+@pytest.mark.usefixtures("socket_enabled")
+@pytest.mark.parametrize("reset", [False, True], ids=["fin", "rst"])
+async def test_ensure_alive_reconnects_closed_session(reset: bool) -> None:
+    """Сессию, закрытую или сброшенную реле, проверка живости заменяет новой."""
+    connections = 0
+
+    async def _relay(
+        reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        nonlocal connections
+        connections += 1
+        await reader.readuntil(b"#")
+        if connections == 1:
+            # Реле роняет первую сессию: FIN или RST (SO_LINGER 0)
+            if reset:
+                writer.get_extra_info("socket").setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 1, 0)
+                )
+                writer.transport.abort()
+            else:
+                writer.close()
+            return
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(_relay, "127.0.0.1", 0)
+    client = DuepiClient("127.0.0.1", server.sockets[0].getsockname()[1], "abc123")
+    with patch("custom_components.kalor.duepi_client.HANDSHAKE_DELAY", 0):
+        async with server:
+            await client.connect()
+            await asyncio.sleep(0.05)  # FIN/RST от реле дошёл
+            assert not client.connected
+
+            await client.async_ensure_alive()
+            assert client.connected
+            assert connections == 2
+            await client.disconnect()
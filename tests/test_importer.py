@@ -0,0 +1,154 @@
+"""Тесты пакетного импорта печей."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from custom_components.kalor.const import (
+    DATA_PENDING_CLIENTS,
+    DOMAIN,
+    SERVICE_IMPORT_STOVES,
+)
+from custom_components.kalor.importer import (
+    IMPORT_ALREADY_CONFIGURED,
+    IMPORT_CANNOT_CONNECT,
+    IMPORT_CREATED,
+    IMPORT_DUPLICATE,
+)
+
+from .conftest import make_client_mock
+
+
+@pytest.fixture(autouse=True)
+async def setup_services(hass: HomeAssistant) -> None:
+    """Компонент загружен, записей ещё нет."""
+    assert await async_setup_component(hass, DOMAIN, {})
+
+
+@pytest.fixture
+def import_clients() -> Generator[dict[str, MagicMock]]:
+    """Клиенты, созданные импортом, по device_code; setup новых не создаёт."""
+    clients: dict[str, MagicMock] = {}
+
+    def _client(**kwargs: Any) -> MagicMock:
+        clients[kwargs["device_code"]] = client = make_client_mock()
+        return client
+
+    with (
+        patch("custom_components.kalor.importer.DuepiClient", side_effect=_client),
+        patch("custom_components.kalor.DuepiClient") as setup_client_cls,
+    ):
+        yield clients
+    setup_client_cls.assert_not_called()
+
+
+async def _import(hass: HomeAssistant, **data: Any) -> list[dict[str, str]]:
+    """Вызов kalor.import_stoves, результаты по кодам."""
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_IMPORT_STOVES, data, blocking=True, return_response=True
+    )
+    await hass.async_block_till_done()
+    return response["results"]
+
+
+async def test_import_dedupes_and_creates(
+    hass: HomeAssistant, import_clients: dict[str, MagicMock]
+) -> None:
+    """Существующие и повторные коды не проверяются, новые — добавляются."""
+    MockConfigEntry(domain=DOMAIN, unique_id="old001", data={}).add_to_hass(hass)
+
+    results = await _import(
+        hass, device_codes=["old001", "new001", " new001 ", "new002", "  "]
+    )
+    assert results == [
+        {"device_code": "old001", "result": IMPORT_ALREADY_CONFIGURED},
+        {"device_code": "new001", "result": IMPORT_CREATED},
+        {"device_code": "new001", "result": IMPORT_DUPLICATE},
+        {"device_code": "new002", "result": IMPORT_CREATED},
+    ]
+    assert set(import_clients) == {"new001", "new002"}
+    entries = {
+        entry.unique_id: entry for entry in hass.config_entries.async_entries(DOMAIN)
+    }
+    # Проверенное соединение досталось записи без переподключения
+    assert entries["new001"].runtime_data.client is import_clients["new001"]
+    assert not hass.data[DOMAIN][DATA_PENDING_CLIENTS]
+
+
+async def test_import_limits_concurrency(
+    hass: HomeAssistant, import_clients: dict[str, MagicMock]
+) -> None:
+    """Одновременно проверяется не больше max_concurrency печей."""
+    in_flight = peak = 0
+
+    async def _test_connection(**kwargs: Any) -> bool:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return True
+
+    def _client(**kwargs: Any) -> MagicMock:
+        client = make_client_mock()
+        client.async_test_connection.side_effect = _test_connection
+        import_clients[kwargs["device_code"]] = client
+        return client
+
+    codes = [f"stove{idx:02d}" for idx in range(7)]
+    with patch("custom_components.kalor.importer.DuepiClient", side_effect=_client):
+        results = await _import(hass, device_codes=codes, max_concurrency=2)
+    assert peak == 2
+    assert [r["result"] for r in results] == [IMPORT_CREATED] * len(codes)
+    assert len(hass.config_entries.async_entries(DOMAIN)) == len(codes)
+
+
+async def test_import_cannot_connect(
+    hass: HomeAssistant, import_clients: dict[str, MagicMock]
+) -> None:
+    """Печь, не ответившая на проверку, не добавляется."""
+
+    def _client(**kwargs: Any) -> MagicMock:
+        client = make_client_mock()
+        client.async_test_connection.return_value = False
+        return client
+
+    with patch("custom_components.kalor.importer.DuepiClient", side_effect=_client):
+        results = await _import(hass, device_codes=["dead01"])
+    assert results == [{"device_code": "dead01", "result": IMPORT_CANNOT_CONNECT}]
+    assert not hass.config_entries.async_entries(DOMAIN)
+
+
+async def test_import_abort_releases_connection(
+    hass: HomeAssistant, import_clients: dict[str, MagicMock]
+) -> None:
+    """Flow прервался — проверенное соединение закрывается и не висит в pending."""
+
+    def _client(**kwargs: Any) -> MagicMock:
+        client = make_client_mock()
+
+        async def _test_connection(**_: Any) -> bool:
+            # Пока шла проверка, печь добавили другим путём
+            MockConfigEntry(
+                domain=DOMAIN, unique_id=kwargs["device_code"], data={}
+            ).add_to_hass(hass)
+            return True
+
+        client.async_test_connection.side_effect = _test_connection
+        import_clients[kwargs["device_code"]] = client
+        return client
+
+    with patch("custom_components.kalor.importer.DuepiClient", side_effect=_client):
+        results = await _import(hass, device_codes=["race01"])
+    assert results == [{"device_code": "race01", "result": "already_configured"}]
+    assert not hass.data[DOMAIN][DATA_PENDING_CLIENTS]
+    import_clients["race01"].disconnect.assert_awaited_once()
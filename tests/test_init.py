@@ -0,0 +1,508 @@
+"""Тесты загрузки интеграции и координатора."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import pytest
+import voluptuous as vol
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_capture_events,
+    async_fire_time_changed,
+    async_fire_time_changed_exact,
+)
+
+from homeassistant.config_entries import SOURCE_USER, ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.util import dt as dt_util
+
+from custom_components.kalor.const import (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_LIMIT,
+    ATTR_SLOT_ID,
+    DOMAIN,
+    EVENT_ALARM,
+    EVENT_STATUS_CHANGED,
+    LIVENESS_DELAY,
+    RESTORE_MAX_AGE,
+    SERVICE_GET_ALARM_HISTORY,
+    SERVICE_GET_SCHEDULE,
+    SERVICE_GET_STOVE_HISTORY,
+    SERVICE_IMPORT_STOVES,
+    SERVICE_REMOVE_SCHEDULE_SLOT,
+    SERVICE_SCAN_REGISTERS,
+    SERVICE_SET_SCHEDULE_SLOT,
+    SERVICE_START_CAPTURE,
+    SERVICE_STOP_CAPTURE,
+    STATE_COOLING,
+    STORAGE_SAVE_DELAY,
+    STORAGE_VERSION,
+)
+
+from .conftest import make_client_mock, make_stove_data
+
+DEVICE_CODE = "abc123"
+
+ALL_SERVICES = (
+    SERVICE_GET_ALARM_HISTORY,
+    SERVICE_GET_SCHEDULE,
+    SERVICE_GET_STOVE_HISTORY,
+    SERVICE_IMPORT_STOVES,
+    SERVICE_REMOVE_SCHEDULE_SLOT,
+    SERVICE_SCAN_REGISTERS,
+    SERVICE_SET_SCHEDULE_SLOT,
+    SERVICE_START_CAPTURE,
+    SERVICE_STOP_CAPTURE,
+)
+
+
+def _mock_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Запись Kalor, добавленная в hass."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id=DEVICE_CODE,
+        data={"device_code": DEVICE_CODE, "host": "127.0.0.1", "port": 3000},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+async def entry(hass: HomeAssistant, mock_client: MagicMock) -> MockConfigEntry:
+    """Загруженная запись Kalor."""
+    entry = _mock_entry(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return entry
+
+
+async def test_setup_and_unload(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Запись загружается с живым поллингом, выгрузка закрывает соединение."""
+    assert entry.state is ConfigEntryState.LOADED
+    assert entry.runtime_data.data == make_stove_data()
+    for service in ALL_SERVICES:
+        assert hass.services.has_service(DOMAIN, service), service
+    assert hass.states.async_all()  # Платформы подняли entities
+
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    assert entry.state is ConfigEntryState.NOT_LOADED
+    mock_client.disconnect.assert_awaited()
+
+
+async def test_restore_from_store(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_client: MagicMock
+) -> None:
+    """Сохранённый StoveData поднимает entities до первого живого поллинга."""
+    entry = _mock_entry(hass)
+    stored = make_stove_data(room_raw=190, target_temp=20)
+    hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.{entry.entry_id}",
+        "data": {
+            "data": asdict(stored),
+            "data_ts": dt_util.utcnow().timestamp() - 60,
+        },
+    }
+    poll_released = asyncio.Event()
+
+    async def _slow_poll() -> Any:
+        await poll_released.wait()
+        return make_stove_data()
+
+    mock_client.async_get_stove_data.side_effect = _slow_poll
+
+    # Setup не ждёт поллинга: он идёт фоновой задачей
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.LOADED
+    coordinator = entry.runtime_data
+    assert coordinator.data == stored
+    assert coordinator.data_restored
+
+    poll_released.set()
+    await hass.async_block_till_done()
+    assert coordinator.data == make_stove_data()
+    assert not coordinator.data_restored
+
+
+@pytest.mark.parametrize(
+    "data_ts",
+    [None, -(RESTORE_MAX_AGE + 1), 3600],
+    ids=["no_timestamp", "too_old", "future"],
+)
+async def test_stale_snapshot_is_not_restored(
+    hass: HomeAssistant,
+    hass_storage: dict[str, Any],
+    mock_client: MagicMock,
+    data_ts: float | None,
+) -> None:
+    """Снимок без времени поллинга или вне RESTORE_MAX_AGE — блокирующий поллинг."""
+    entry = _mock_entry(hass)
+    stored: dict[str, Any] = {"data": asdict(make_stove_data(room_raw=190))}
+    if data_ts is not None:
+        stored["data_ts"] = dt_util.utcnow().timestamp() + data_ts
+    hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.{entry.entry_id}",
+        "data": stored,
+    }
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    coordinator = entry.runtime_data
+    assert coordinator.data == make_stove_data()
+    assert not coordinator.data_restored
+    mock_client.async_get_stove_data.assert_awaited_once()
+
+
+async def test_unreadable_store_falls_back_to_first_refresh(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_client: MagicMock
+) -> None:
+    """Битый снимок в хранилище — обычный блокирующий первый поллинг."""
+    entry = _mock_entry(hass)
+    hass_storage[f"{DOMAIN}.{entry.entry_id}"] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": f"{DOMAIN}.{entry.entry_id}",
+        "data": {"data": {"status_raw": 1}},
+    }
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.runtime_data.data == make_stove_data()
+    mock_client.async_get_stove_data.assert_awaited_once()
+
+
+async def test_config_flow_client_is_reused(hass: HomeAssistant) -> None:
+    """Соединение, проверенное config flow, переходит в setup без reconnect."""
+    flow_client = make_client_mock()
+    with (
+        patch(
+            "custom_components.kalor.config_flow.DuepiClient",
+            return_value=flow_client,
+        ),
+        patch("custom_components.kalor.DuepiClient") as setup_client_cls,
+    ):
+        result = await hass.config_entries.flow.async_init(
+            DOMAIN, context={"source": SOURCE_USER}
+        )
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"],
+            {"device_code": DEVICE_CODE, "host": "127.0.0.1", "port": 3000},
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    flow_client.async_test_connection.assert_awaited_once_with(keep_connected=True)
+    setup_client_cls.assert_not_called()
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    assert entry.runtime_data.client is flow_client
+    flow_client.connect.assert_not_called()
+
+
+async def test_metrics_restored_and_saved(
+    hass: HomeAssistant, hass_storage: dict[str, Any], mock_client: MagicMock
+) -> None:
+    """Счётчики переживают рестарт: читаются из Store и пишутся обратно."""
+    entry = _mock_entry(hass)
+    key = f"{DOMAIN}.{entry.entry_id}"
+    hass_storage[key] = {
+        "version": STORAGE_VERSION,
+        "minor_version": 1,
+        "key": key,
+        "data": {
+            "data": asdict(make_stove_data()),
+            "metrics": {"burn_seconds": 7200.0, "ignition_count": 3},
+        },
+    }
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = entry.runtime_data
+    assert coordinator.metrics.burn_hours == 2
+    assert coordinator.metrics.ignition_count == 3
+
+    # Отложенная запись Store
+    async_fire_time_changed(
+        hass, dt_util.utcnow() + timedelta(seconds=STORAGE_SAVE_DELAY + 1)
+    )
+    await hass.async_block_till_done()
+    assert hass_storage[key]["data"]["metrics"]["ignition_count"] == 3
+    assert hass_storage[key]["data"]["data_ts"]  # Время поллинга снимка
+
+
+async def test_transition_events(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Смена статуса и кода ошибки — по одному событию с данными перехода."""
+    status_events = async_capture_events(hass, EVENT_STATUS_CHANGED)
+    alarm_events = async_capture_events(hass, EVENT_ALARM)
+    coordinator = entry.runtime_data
+
+    mock_client.async_get_stove_data.return_value = make_stove_data(
+        status_raw=STATE_COOLING, alarm_code=5
+    )
+    await coordinator.async_refresh()
+    await coordinator.async_refresh()  # Без изменений — без событий
+    await hass.async_block_till_done()
+
+    assert len(status_events) == 1
+    assert status_events[0].data == {
+        ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+        "device_code": DEVICE_CODE,
+        "status": coordinator.data.status_text,
+        "status_raw": STATE_COOLING,
+        "previous_status": make_stove_data().status_text,
+        "previous_status_raw": make_stove_data().status_raw,
+    }
+    assert len(alarm_events) == 1
+    assert alarm_events[0].data["alarm_code"] == 5
+    assert alarm_events[0].data["previous_code"] == 0
+    assert not alarm_events[0].data["cleared"]
+
+
+async def test_alarm_history_service(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """История отдаёт переходы alarm_code от новых к старым."""
+    coordinator = entry.runtime_data
+    for code in (5, 0):
+        mock_client.async_get_stove_data.return_value = make_stove_data(
+            alarm_code=code
+        )
+        await coordinator.async_refresh()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_ALARM_HISTORY,
+        {ATTR_CONFIG_ENTRY_ID: entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+    assert [(a["alarm_code"], a["cleared"]) for a in response["alarms"]] == [
+        (0, True),
+        (5, False),
+    ]
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_ALARM_HISTORY,
+        {ATTR_CONFIG_ENTRY_ID: entry.entry_id, ATTR_LIMIT: 1},
+        blocking=True,
+        return_response=True,
+    )
+    assert len(response["alarms"]) == 1
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_GET_ALARM_HISTORY,
+            {ATTR_CONFIG_ENTRY_ID: "missing"},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_schedule_services(
+    hass: HomeAssistant, entry: MockConfigEntry
+) -> None:
+    """Слот, добавленный сервисом, виден в get_schedule и удаляется."""
+    created = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SET_SCHEDULE_SLOT,
+        {
+            ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+            "day_of_week": 0,
+            "start_time": "08:00",
+            "end_time": "10:30",
+            "target_temperature": 21,
+            "power_level": 2,
+        },
+        blocking=True,
+        return_response=True,
+    )
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_SCHEDULE,
+        {ATTR_CONFIG_ENTRY_ID: entry.entry_id},
+        blocking=True,
+        return_response=True,
+    )
+    [slot] = response["slots"]
+    assert slot[ATTR_SLOT_ID] == created[ATTR_SLOT_ID]
+    assert (slot["end_hour"], slot["end_minute"]) == (10, 30)
+    assert response["next_transition"] is not None
+
+    remove = {ATTR_CONFIG_ENTRY_ID: entry.entry_id, ATTR_SLOT_ID: slot[ATTR_SLOT_ID]}
+    await hass.services.async_call(
+        DOMAIN, SERVICE_REMOVE_SCHEDULE_SLOT, remove, blocking=True
+    )
+    assert not entry.runtime_data.schedule.slots
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_REMOVE_SCHEDULE_SLOT, remove, blocking=True
+        )
+
+
+async def test_scan_registers_service(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Диапазон с регистром записи внутри читает только регистры чтения."""
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SCAN_REGISTERS,
+        {
+            ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+            "registers": ["c6"],
+            "range_start": "D5",
+            "range_end": "D7",
+        },
+        blocking=True,
+        return_response=True,
+    )
+    assert list(response["registers"]) == ["C6", "D5", "D7"]
+    sent = [call.args[0] for call in mock_client.async_read_register.await_args_list]
+    assert sent == ["C6", "D5", "D7"]
+
+
+@pytest.mark.parametrize("data", [{}, {"registers": []}, {"range_start": "D0"}])
+async def test_scan_requires_registers_or_range(
+    hass: HomeAssistant, entry: MockConfigEntry, data: dict[str, Any]
+) -> None:
+    """Вызов без регистров и без полного диапазона отклоняется схемой."""
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SCAN_REGISTERS,
+            {ATTR_CONFIG_ENTRY_ID: entry.entry_id, **data},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_scan_range_only(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Диапазон без списка регистров — допустимый вызов."""
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_SCAN_REGISTERS,
+        {ATTR_CONFIG_ENTRY_ID: entry.entry_id, "range_start": "D0", "range_end": "D1"},
+        blocking=True,
+        return_response=True,
+    )
+    assert list(response["registers"]) == ["D0", "D1"]
+
+
+@pytest.mark.parametrize("register", ["F0", "f2", "D6", "FF"])
+async def test_scan_rejects_write_registers(
+    hass: HomeAssistant, entry: MockConfigEntry, register: str
+) -> None:
+    """Регистры записи отклоняются схемой сервиса."""
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_SCAN_REGISTERS,
+            {ATTR_CONFIG_ENTRY_ID: entry.entry_id, "registers": [register]},
+            blocking=True,
+            return_response=True,
+        )
+
+
+async def test_capture_services(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Запись пишется в каталог конфигурации, повторный старт — ошибка вызова."""
+    data = {ATTR_CONFIG_ENTRY_ID: entry.entry_id}
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_START_CAPTURE, data, blocking=True, return_response=True
+    )
+    path = mock_client.start_capture.call_args.args[0]
+    assert response == {"path": str(path)}
+    assert str(path.parent) == hass.config.config_dir
+
+    mock_client.start_capture.side_effect = RuntimeError("Запись уже идёт")
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN, SERVICE_START_CAPTURE, data, blocking=True, return_response=True
+        )
+
+    mock_client.async_stop_capture.return_value = path
+    response = await hass.services.async_call(
+        DOMAIN, SERVICE_STOP_CAPTURE, data, blocking=True, return_response=True
+    )
+    assert response == {"path": str(path)}
+
+
+async def test_liveness_check_before_next_poll(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """После поллинга соединение проверяется до следующего поллинга."""
+    async_fire_time_changed_exact(
+        hass, dt_util.utcnow() + timedelta(seconds=LIVENESS_DELAY - 0.5)
+    )
+    await hass.async_block_till_done()
+    mock_client.async_ensure_alive.assert_not_awaited()
+    async_fire_time_changed_exact(
+        hass, dt_util.utcnow() + timedelta(seconds=LIVENESS_DELAY)
+    )
+    await hass.async_block_till_done()
+    mock_client.async_ensure_alive.assert_awaited_once()
+    assert mock_client.async_get_stove_data.await_count == 1
+
+
+async def test_unchanged_poll_reuses_snapshot(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Равный снимок не будит entities и не заменяет объект данных."""
+    coordinator = entry.runtime_data
+    snapshot = coordinator.data
+    listener = MagicMock()
+    remove = coordinator.async_add_listener(listener)
+
+    mock_client.async_get_stove_data.return_value = make_stove_data()
+    await coordinator.async_refresh()
+    assert coordinator.data is snapshot
+    listener.assert_not_called()
+
+    mock_client.async_get_stove_data.return_value = make_stove_data(room_raw=230)
+    await coordinator.async_refresh()
+    remove()
+    listener.assert_called_once()
+
+
+async def test_metric_sensors_update_without_data_change(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Моточасы растут и при неизменном StoveData."""
+    coordinator = entry.runtime_data
+    listener = MagicMock()
+    remove = coordinator.async_add_metrics_listener(listener)
+    coordinator.metrics.last_ts -= 12  # Прошёл один интервал поллинга
+    await coordinator.async_refresh()
+    remove()
+    listener.assert_called_once()
+    assert coordinator.metrics.burn_seconds > 0
+
+
+async def test_stove_history_keeps_changes_only(
+    hass: HomeAssistant, entry: MockConfigEntry, mock_client: MagicMock
+) -> None:
+    """Неизменившийся поллинг не добавляет снимок в историю."""
+    coordinator = entry.runtime_data
+    await coordinator.async_refresh()
+    mock_client.async_get_stove_data.return_value = make_stove_data(room_raw=230)
+    await coordinator.async_refresh()
+
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_GET_STOVE_HISTORY,
+        {ATTR_CONFIG_ENTRY_ID: entry.entry_id, "fields": ["room_temp"]},
+        blocking=True,
+        return_response=True,
+    )
+    assert [snap["room_temp"] for snap in response["snapshots"]] == [23.0, 21.5]
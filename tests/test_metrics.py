@@ -0,0 +1,88 @@
+"""Тесты накопительных метрик."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.kalor.const import (
+    METRICS_MAX_GAP,
+    PELLET_KG_PER_SPEED_HOUR,
+    STATE_IGNITION,
+)
+from custom_components.kalor.metrics import KalorMetrics
+
+from .conftest import make_off_data, make_stove_data
+
+
+def test_first_sample_only_primes_state() -> None:
+    """Первый сэмпл ничего не интегрирует и не считает переходом."""
+    metrics = KalorMetrics()
+    assert not metrics.update(make_stove_data(status_raw=STATE_IGNITION), 1000.0)
+    assert metrics.burn_seconds == 0
+    assert metrics.ignition_count == 0
+    assert metrics.last_ts == 1000.0
+
+
+def test_burn_and_pellets_integrate_previous_sample() -> None:
+    """Интеграл считается по предыдущему сэмплу на интервале."""
+    metrics = KalorMetrics()
+    metrics.update(make_stove_data(pellet_speed=30), 0.0)
+    assert metrics.update(make_stove_data(pellet_speed=10), 60.0)
+    assert metrics.burn_seconds == 60
+    assert metrics.pellet_integral == pytest.approx(30 * 60 / 3600)
+    assert metrics.pellet_kg == pytest.approx(
+        30 * 60 / 3600 * PELLET_KG_PER_SPEED_HOUR
+    )
+    # Выключение: интервал до него ещё горел
+    metrics.update(make_off_data(), 120.0)
+    assert metrics.burn_seconds == 120
+    # Дальше печь выключена — счётчики стоят
+    assert not metrics.update(make_off_data(), 180.0)
+    assert metrics.burn_seconds == 120
+
+
+@pytest.mark.parametrize("gap", [METRICS_MAX_GAP + 1, 0, -5])
+def test_gap_is_not_integrated(gap: float) -> None:
+    """Разрыв длиннее METRICS_MAX_GAP или сдвиг часов назад пропускаются."""
+    metrics = KalorMetrics()
+    metrics.update(make_stove_data(), 1000.0)
+    metrics.update(make_stove_data(), 1000.0 + gap)
+    assert metrics.burn_seconds == 0
+    assert metrics.pellet_integral == 0
+    # После разрыва интегрирование продолжается от нового сэмпла
+    metrics.update(make_stove_data(), 1000.0 + gap + 12)
+    assert metrics.burn_seconds == 12
+
+
+def test_ignition_counted_on_rising_edge() -> None:
+    """Розжиг считается один раз на фронт, не на каждый сэмпл."""
+    metrics = KalorMetrics()
+    metrics.update(make_off_data(), 0.0)
+    metrics.update(make_stove_data(status_raw=STATE_IGNITION), 12.0)
+    metrics.update(make_stove_data(status_raw=STATE_IGNITION), 24.0)
+    metrics.update(make_stove_data(), 36.0)
+    assert metrics.ignition_count == 1
+    metrics.update(make_off_data(), 48.0)
+    metrics.update(make_stove_data(status_raw=STATE_IGNITION), 60.0)
+    assert metrics.ignition_count == 2
+
+
+def test_alarm_counted_on_new_code() -> None:
+    """Ошибка считается при появлении нового ненулевого кода."""
+    metrics = KalorMetrics()
+    metrics.update(make_off_data(), 0.0)
+    metrics.update(make_off_data(alarm_code=5), 12.0)
+    metrics.update(make_off_data(alarm_code=5), 24.0)
+    assert metrics.alarm_count == 1
+    metrics.update(make_off_data(alarm_code=7), 36.0)
+    metrics.update(make_off_data(), 48.0)
+    assert metrics.alarm_count == 2
+
+
+def test_round_trip_ignores_unknown_keys() -> None:
+    """from_dict восстанавливает as_dict и терпит лишние ключи."""
+    metrics = KalorMetrics()
+    metrics.update(make_off_data(), 0.0)
+    metrics.update(make_stove_data(status_raw=STATE_IGNITION), 12.0)
+    restored = KalorMetrics.from_dict({**metrics.as_dict(), "legacy": 1})
+    assert restored == metrics
@@ -0,0 +1,138 @@
+"""Тесты скана регистров: TTL-кэш, регистры записи, фоновый приоритет."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from custom_components.kalor.duepi_client import DuepiClient, DuepiCommandError
+from custom_components.kalor.registers import RegisterScanner, register_range
+
+REPLY = "\x1b00D70000&"
+
+
+def _scanner() -> tuple[RegisterScanner, AsyncMock]:
+    """Сканер поверх клиента, который всегда отвечает REPLY."""
+    client = MagicMock()
+    client.async_read_register = AsyncMock(return_value=REPLY)
+    return RegisterScanner(client), client.async_read_register
+
+
+def test_register_range_skips_write_registers() -> None:
+    """Диапазон через F0–FF и D6 их не содержит."""
+    registers = register_range("C0", "FF")
+    assert "D6" not in registers
+    assert not any(reg.startswith("F") for reg in registers)
+    assert registers[0] == "C0"
+    assert registers[-1] == "EF"
+    assert register_range("D2", "D0") == ["D0", "D1", "D2"]
+
+
+async def test_scan_decodes_and_caches() -> None:
+    """Повторное чтение в пределах max_age идёт из кэша."""
+    scanner, read = _scanner()
+    with patch("custom_components.kalor.registers.time.monotonic", return_value=100):
+        first = await scanner.async_scan(["d1", "D1"])
+    read.assert_awaited_once_with("D1", low_priority=True)
+    assert first["D1"] == {
+        "command": "D1000",
+        "raw": REPLY,
+        "value": 0xD7,
+        "value32": 0xD70000,
+        "cached": False,
+        "age": 0,
+    }
+
+    with patch("custom_components.kalor.registers.time.monotonic", return_value=130):
+        second = await scanner.async_scan(["D1"], max_age=60)
+    assert read.await_count == 1
+    assert second["D1"]["cached"]
+    assert second["D1"]["age"] == 30
+
+
+async def test_scan_rereads_stale_entries() -> None:
+    """Запись старше max_age перечитывается."""
+    scanner, read = _scanner()
+    with patch("custom_components.kalor.registers.time.monotonic", return_value=100):
+        await scanner.async_scan(["D1"])
+    with patch("custom_components.kalor.registers.time.monotonic", return_value=111):
+        result = await scanner.async_scan(["D1"], max_age=10)
+    assert read.await_count == 2
+    assert not result["D1"]["cached"]
+
+
+async def test_scan_never_sends_write_registers() -> None:
+    """Регистр записи в списке отвечает ошибкой, а не командой."""
+    scanner, read = _scanner()
+    result = await scanner.async_scan(["F2", "D6"])
+    read.assert_not_awaited()
+    assert set(result) == {"F2", "D6"}
+    assert all("error" in entry for entry in result.values())
+
+
+async def test_client_refuses_write_registers() -> None:
+    """async_read_register не отправляет {reg}000 для регистров записи."""
+    client = DuepiClient("127.0.0.1", 3000, "abc123")
+    with pytest.raises(DuepiCommandError):
+        await client.async_read_register("f0")
+
+
+@pytest.fixture
+def gated_client() -> Generator[
+    tuple[DuepiClient, list[str], dict[str, asyncio.Event]]
+]:
+    """Клиент без сети: _send_raw пишет команды и ждёт «ворота» по команде."""
+    client = DuepiClient("127.0.0.1", 3000, "abc123")
+    client._ensure_connected = AsyncMock()  # type: ignore[method-assign]
+    sent: list[str] = []
+    gates: dict[str, asyncio.Event] = {}
+
+    async def _send_raw(cmd: str) -> str:
+        sent.append(cmd)
+        if cmd in gates:
+            await gates[cmd].wait()
+        return "\x1b00000000&"
+
+    client._send_raw = _send_raw  # type: ignore[method-assign]
+    with patch("custom_components.kalor.duepi_client.COMMAND_DELAY", 0):
+        yield client, sent, gates
+
+
+async def test_low_priority_waits_for_poll(
+    gated_client: tuple[DuepiClient, list[str], dict[str, asyncio.Event]],
+) -> None:
+    """Фоновое чтение не вклинивается между командами поллинга."""
+    client, sent, gates = gated_client
+    gates["D0000"] = asyncio.Event()  # Третья команда поллинга
+    poll = asyncio.ensure_future(client.async_get_stove_data())
+    await asyncio.sleep(0)
+    scan = asyncio.ensure_future(client.async_read_register("C0", low_priority=True))
+    await asyncio.sleep(0.01)
+    assert sent == ["D9000", "D1000", "D0000"]
+
+    gates["D0000"].set()
+    await poll
+    assert await scan == "\x1b00000000&"
+    assert len(sent) == 9
+    assert sent[-1] == "C0000"
+
+
+async def test_low_priority_yields_to_queued_command(
+    gated_client: tuple[DuepiClient, list[str], dict[str, asyncio.Event]],
+) -> None:
+    """Обычная команда, вставшая в очередь, проходит раньше следующей фоновой."""
+    client, sent, gates = gated_client
+    gates["D0000"] = asyncio.Event()
+    first = asyncio.ensure_future(client.async_read_register("D0", low_priority=True))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(client.async_read_register("D1", low_priority=True))
+    command = asyncio.ensure_future(client.send_command("D3000"))
+    await asyncio.sleep(0.01)
+    assert sent == ["D0000"]
+
+    gates["D0000"].set()
+    await asyncio.gather(first, second, command)
+    assert sent == ["D0000", "D3000", "D1000"]
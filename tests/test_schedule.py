@@ -0,0 +1,247 @@
+"""Тесты недельного расписания."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator
+from datetime import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from custom_components.kalor.schedule import (
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    TRANSITION_END,
+    TRANSITION_START,
+    KalorSchedule,
+    ScheduleSlot,
+    week_minute,
+)
+
+from .conftest import make_off_data, make_stove_data
+
+SUNDAY = 6
+# 2026-10-25 — воскресенье, 2026-10-26 — понедельник
+SUNDAY_2330 = datetime(2026, 10, 25, 23, 30, tzinfo=dt_util.UTC)
+
+
+def _slot(
+    slot_id: str,
+    day: int,
+    start: tuple[int, int],
+    end: tuple[int, int],
+    **kwargs: int,
+) -> ScheduleSlot:
+    """Слот с целевой 22°C / мощность 3 по умолчанию."""
+    return ScheduleSlot(
+        slot_id=slot_id,
+        day_of_week=day,
+        start_hour=start[0],
+        start_minute=start[1],
+        end_hour=end[0],
+        end_minute=end[1],
+        target_temp=kwargs.get("target_temp", 22),
+        power_level=kwargs.get("power_level", 3),
+        enabled=bool(kwargs.get("enabled", True)),
+    )
+
+
+def test_slot_within_day() -> None:
+    """Обычный слот: конец в тот же день, граница конца не входит."""
+    slot = _slot("a", 0, (8, 0), (10, 0))
+    assert (slot.start, slot.end) == (480, 600)
+    assert slot.covers(480)
+    assert slot.covers(599)
+    assert not slot.covers(600)
+    assert not slot.covers(479)
+
+
+def test_slot_wraps_sunday_to_monday() -> None:
+    """Воскресный слот через полночь заканчивается в начале недели."""
+    slot = _slot("a", SUNDAY, (22, 0), (2, 0))
+    assert slot.start == SUNDAY * MINUTES_PER_DAY + 22 * 60
+    assert slot.end == 120
+    assert slot.covers(MINUTES_PER_WEEK - 1)  # Вс 23:59
+    assert slot.covers(0)  # Пн 00:00
+    assert slot.covers(119)
+    assert not slot.covers(120)
+    assert not slot.covers(slot.start - 1)
+
+
+def test_slot_with_equal_start_and_end_covers_whole_day() -> None:
+    """Конец равен началу — слот на сутки, а не пустой."""
+    slot = _slot("a", 2, (6, 0), (6, 0))
+    assert slot.end == slot.start + MINUTES_PER_DAY
+    assert slot.covers(slot.start + MINUTES_PER_DAY - 1)
+    assert not slot.covers(slot.end)
+
+
+def test_disabled_slot_has_no_transitions() -> None:
+    """Выключенный слот в таймер не попадает."""
+    assert _slot("a", 0, (8, 0), (9, 0), enabled=False).transitions() == []
+
+
+def test_week_minute() -> None:
+    """Минута недели считается от понедельника 00:00."""
+    assert week_minute(SUNDAY_2330) == MINUTES_PER_WEEK - 30
+
+
+@pytest.fixture
+def coordinator() -> MagicMock:
+    """Координатор с клиентом-заглушкой и горящей печью."""
+    coordinator = MagicMock()
+    coordinator.config_entry.entry_id = "entry"
+    coordinator.data = make_stove_data()
+    coordinator.data_restored = False
+    coordinator.async_request_refresh = AsyncMock()
+    client = coordinator.client
+    client.async_power_on = AsyncMock()
+    client.async_power_off = AsyncMock()
+    client.async_set_target_temp = AsyncMock()
+    client.async_set_power_level = AsyncMock()
+    return coordinator
+
+
+@pytest.fixture
+async def schedule(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, coordinator: MagicMock
+) -> AsyncGenerator[KalorSchedule]:
+    """Расписание в UTC, время — воскресенье 23:30."""
+    await hass.config.async_set_time_zone("UTC")
+    freezer.move_to(SUNDAY_2330)
+    schedule = KalorSchedule(hass, coordinator)
+    stop = schedule.async_start()
+    yield schedule
+    stop()
+
+
+async def test_next_transition_wraps_to_monday(schedule: KalorSchedule) -> None:
+    """Из воскресенья ближайший переход — в понедельник."""
+    schedule.async_set_slot(_slot("mon", 0, (6, 0), (8, 0)))
+    assert schedule.next_transition == datetime(2026, 10, 26, 6, 0, tzinfo=dt_util.UTC)
+
+
+async def test_next_transition_of_overnight_slot(schedule: KalorSchedule) -> None:
+    """Идущий слот через полночь: ближайший переход — его конец в понедельник."""
+    schedule.async_set_slot(_slot("mon", 0, (6, 0), (8, 0)))
+    schedule.async_set_slot(_slot("night", SUNDAY, (23, 0), (1, 0)))
+    assert schedule.next_transition == datetime(2026, 10, 26, 1, 0, tzinfo=dt_util.UTC)
+    # Удаление слота возвращает таймер к следующему переходу
+    assert schedule.async_remove_slot("night")
+    assert schedule.next_transition == datetime(2026, 10, 26, 6, 0, tzinfo=dt_util.UTC)
+    assert not schedule.async_remove_slot("night")
+
+
+async def test_passed_slot_fires_next_week(schedule: KalorSchedule) -> None:
+    """Единственный переход позади — таймер на ту же минуту через неделю."""
+    schedule.async_set_slot(_slot("sun", SUNDAY, (23, 0), (23, 15)))
+    assert schedule.next_transition == datetime(
+        2026, 11, 1, 23, 0, tzinfo=dt_util.UTC
+    )
+
+
+async def test_no_slots_no_timer(schedule: KalorSchedule) -> None:
+    """Пустое расписание таймер не держит."""
+    schedule.async_set_slot(_slot("mon", 0, (6, 0), (8, 0)))
+    schedule.async_remove_slot("mon")
+    assert schedule.next_transition is None
+
+
+async def test_end_sorted_before_start_on_same_minute(
+    hass: HomeAssistant,
+    schedule: KalorSchedule,
+    freezer: FrozenDateTimeFactory,
+    coordinator: MagicMock,
+) -> None:
+    """На стыке слотов конец первого не выключает печь, второй применяется."""
+    schedule.async_set_slot(_slot("early", 0, (0, 0), (1, 0)))
+    schedule.async_set_slot(_slot("late", 0, (1, 0), (2, 0), target_temp=25))
+    transitions = schedule._transitions
+    boundary = [t for t in transitions if t[0] == 60]
+    assert [kind for _, kind, _ in boundary] == [TRANSITION_END, TRANSITION_START]
+
+    fire_at = datetime(2026, 10, 26, 0, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+    fire_at = datetime(2026, 10, 26, 1, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+
+    client = coordinator.client
+    client.async_power_off.assert_not_called()
+    client.async_set_target_temp.assert_awaited_once_with(25)
+    assert schedule.next_transition == datetime(2026, 10, 26, 2, 0, tzinfo=dt_util.UTC)
+
+
+async def test_start_skips_matching_writes(
+    hass: HomeAssistant,
+    schedule: KalorSchedule,
+    freezer: FrozenDateTimeFactory,
+    coordinator: MagicMock,
+) -> None:
+    """Печь уже в состоянии слота — команды не отправляются."""
+    schedule.async_set_slot(_slot("mon", 0, (0, 0), (1, 0)))
+    fire_at = datetime(2026, 10, 26, 0, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+
+    client = coordinator.client
+    client.async_power_on.assert_not_called()
+    client.async_set_target_temp.assert_not_called()
+    client.async_set_power_level.assert_not_called()
+    coordinator.async_request_refresh.assert_not_called()
+
+
+async def test_restored_data_does_not_skip_writes(
+    hass: HomeAssistant,
+    schedule: KalorSchedule,
+    freezer: FrozenDateTimeFactory,
+    coordinator: MagicMock,
+) -> None:
+    """Снимок из Store мог устареть — слот применяется целиком."""
+    coordinator.data_restored = True
+    schedule.async_set_slot(_slot("mon", 0, (0, 0), (1, 0)))
+    fire_at = datetime(2026, 10, 26, 0, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+
+    client = coordinator.client
+    client.async_power_on.assert_awaited_once()
+    client.async_set_target_temp.assert_awaited_once_with(22)
+    client.async_set_power_level.assert_awaited_once_with(3)
+
+
+async def test_start_and_end_on_stove_off(
+    hass: HomeAssistant,
+    schedule: KalorSchedule,
+    freezer: FrozenDateTimeFactory,
+    coordinator: MagicMock,
+) -> None:
+    """Начало слота включает выключенную печь, конец — выключает."""
+    coordinator.data = make_off_data()
+    schedule.async_set_slot(_slot("mon", 0, (0, 0), (1, 0), power_level=4))
+    fire_at = datetime(2026, 10, 26, 0, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+
+    client = coordinator.client
+    client.async_power_on.assert_awaited_once()
+    client.async_set_target_temp.assert_not_called()
+    client.async_set_power_level.assert_awaited_once_with(4)
+
+    coordinator.data = make_stove_data(power_level=4)
+    fire_at = datetime(2026, 10, 26, 1, 0, tzinfo=dt_util.UTC)
+    freezer.move_to(fire_at)
+    async_fire_time_changed(hass, fire_at)
+    await hass.async_block_till_done()
+    client.async_power_off.assert_awaited_once()
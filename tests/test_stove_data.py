@@ -0,0 +1,89 @@
+"""Тесты снимка StoveData: производные поля, diff, хранение, история."""
+
+from __future__ import annotations
+
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from custom_components.kalor.const import ERROR_CODES, STATE_COOLING, STATE_IGNITION
+from custom_components.kalor.duepi_client import StoveData
+from custom_components.kalor.history import StoveHistory
+
+from .conftest import make_off_data, make_stove_data
+
+
+def test_derived_fields() -> None:
+    """Производные поля считаются из сырых регистров."""
+    data = make_stove_data(room_raw=215, fan_raw=140, alarm_code=5)
+    assert (data.status_text, data.is_on, data.is_heating) == ("Working", True, True)
+    assert data.room_temp == 21.5
+    assert data.fan_speed == 1400
+    assert data.has_alarm
+    assert data.alarm_text == ERROR_CODES[5]
+
+    off = make_off_data()
+    assert (off.status_text, off.is_on, off.is_heating) == ("Off", False, False)
+    assert not make_stove_data(status_raw=STATE_COOLING).is_heating
+    assert make_stove_data(status_raw=STATE_IGNITION).is_heating
+
+
+def test_snapshot_is_frozen() -> None:
+    """Снимок неизменяем — его можно делить между поллингами и историей."""
+    with pytest.raises(FrozenInstanceError):
+        make_stove_data().room_raw = 0  # type: ignore[misc]
+
+
+def test_diff_lists_changed_raw_fields() -> None:
+    """diff отдаёт только изменившиеся сырые поля."""
+    before = make_stove_data()
+    assert before.diff(make_stove_data()) == {}
+    assert before.diff(make_stove_data(room_raw=230, alarm_code=5)) == {
+        "room_raw": (215, 230),
+        "alarm_code": (0, 5),
+    }
+
+
+def test_store_round_trip() -> None:
+    """as_dict/from_dict сохраняют снимок без производных полей."""
+    data = make_stove_data(alarm_code=5)
+    stored = data.as_dict()
+    assert "room_temp" not in stored
+    assert StoveData.from_dict(stored) == data
+
+
+def test_from_dict_reads_previous_format() -> None:
+    """Прежний формат Store (производные поля) восстанавливается."""
+    legacy = {
+        "status_raw": make_stove_data().status_raw,
+        "status_text": "Working",
+        "is_on": True,
+        "is_heating": True,
+        "room_temp": 21.5,
+        "target_temp": 22,
+        "fumes_temp": 140,
+        "power_level": 3,
+        "pellet_speed": 28,
+        "fan_speed": 1400,
+        "alarm_code": 0,
+        "alarm_text": "No error",
+        "has_alarm": False,
+    }
+    assert StoveData.from_dict(legacy) == make_stove_data()
+
+
+def test_history_records_distinct_snapshots() -> None:
+    """История хранит только смены и отдаёт те же объекты."""
+    history = StoveHistory(size=2)
+    first = make_stove_data()
+    assert history.record(0, first)
+    assert not history.record(12, first)
+    assert not history.record(24, make_stove_data())
+    second = make_stove_data(room_raw=230)
+    assert history.record(36, second)
+    assert history.record(48, make_off_data())
+    assert len(history) == 2  # Старейший вытеснен
+    assert [data for _, data in history.snapshots()][1] is second
+    assert history.series("room_temp", limit=1) == [(48, 21.5)]
+    with pytest.raises(KeyError):
+        history.series("room_raw_typo")
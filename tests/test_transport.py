@@ -0,0 +1,123 @@
+"""Тесты DuepiProtocol: FIFO ответов, поздние ответы, таймауты."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator
+import socket
+
+import pytest
+
+from custom_components.kalor.const import RESPONSE_LENGTH
+from custom_components.kalor.transport import TIMEOUT_RESOLUTION, DuepiProtocol
+
+REPLY_A = b"\x1b00D70000&"
+REPLY_B = b"\x1b008C0000&"
+
+
+@pytest.fixture
+async def relay() -> AsyncGenerator[tuple[DuepiProtocol, socket.socket]]:
+    """Протокол на одном конце socketpair, «реле» — на другом."""
+    ours, theirs = socket.socketpair()
+    theirs.setblocking(False)
+    loop = asyncio.get_running_loop()
+    _, protocol = await loop.create_connection(DuepiProtocol, sock=ours)
+    yield protocol, theirs
+    protocol.close()
+    theirs.close()
+    # Общий таймер снимается на следующем обходе, когда ждать нечего
+    await asyncio.sleep(TIMEOUT_RESOLUTION * 2)
+
+
+async def _reply(theirs: socket.socket, data: bytes) -> None:
+    """Отправить байты от имени реле."""
+    await asyncio.get_running_loop().sock_sendall(theirs, data)
+
+
+async def test_pipelined_replies_resolve_in_order(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Ответы раздаются по FIFO, даже если пришли одним куском с разрывом."""
+    protocol, theirs = relay
+    first = asyncio.ensure_future(protocol.request(b"\x1bRD100005&"))
+    second = asyncio.ensure_future(protocol.request(b"\x1bRD000004&"))
+    await asyncio.sleep(0)
+    # 15 + 5 байт: второй ответ разрезан между чтениями
+    data = REPLY_A + REPLY_B
+    await _reply(theirs, data[:15])
+    await asyncio.sleep(0.05)
+    assert first.done() and not second.done()
+    await _reply(theirs, data[15:])
+    assert await first == REPLY_A
+    assert await second == REPLY_B
+
+
+async def test_unsolicited_reply_is_dropped(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Ответ без ожидающего запроса не достаётся следующей команде."""
+    protocol, theirs = relay
+    await _reply(theirs, REPLY_A)
+    await asyncio.sleep(0.05)
+    request = asyncio.ensure_future(protocol.request(b"\x1bRD000004&"))
+    await asyncio.sleep(0.05)
+    assert not request.done()
+    await _reply(theirs, REPLY_B)
+    assert await request == REPLY_B
+
+
+async def test_partial_reply_waits_for_rest(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Неполный кадр остаётся в буфере до прихода остатка."""
+    protocol, theirs = relay
+    request = asyncio.ensure_future(protocol.request(b"\x1bRD100005&"))
+    await _reply(theirs, REPLY_A[: RESPONSE_LENGTH - 1])
+    await asyncio.sleep(0.05)
+    assert not request.done()
+    await _reply(theirs, REPLY_A[RESPONSE_LENGTH - 1 :])
+    assert await request == REPLY_A
+
+
+async def test_timeout_closes_connection(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Таймаут проваливает ответ и закрывает соединение.
+
+    Иначе поздний ответ сдвинул бы FIFO и достался следующей команде.
+    """
+    protocol, _ = relay
+    with pytest.raises(TimeoutError):
+        await protocol.request(b"\x1bRD100005&", timeout=0.1)
+    await asyncio.sleep(0.05)
+    assert not protocol.is_open
+    # Поздний ответ уже некому получить, новая команда не уходит
+    with pytest.raises(ConnectionResetError):
+        await protocol.request(b"\x1bRD000004&")
+
+
+async def test_timeout_fails_whole_queue(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Просроченная голова FIFO и всё, что за ней, проваливаются вместе."""
+    protocol, _ = relay
+    first = asyncio.ensure_future(protocol.request(b"\x1bRD100005&", timeout=0.1))
+    second = asyncio.ensure_future(protocol.request(b"\x1bRD000004&", timeout=30))
+    with pytest.raises(TimeoutError):
+        await first
+    # Соединение закрыто — второй ответ тоже не придёт
+    with pytest.raises(ConnectionResetError):
+        await second
+
+
+async def test_connection_lost_fails_pending(
+    relay: tuple[DuepiProtocol, socket.socket],
+) -> None:
+    """Разрыв реле проваливает все ожидающие ответы."""
+    protocol, theirs = relay
+    request = asyncio.ensure_future(protocol.request(b"\x1bRD100005&"))
+    await asyncio.sleep(0)
+    theirs.close()
+    with pytest.raises(ConnectionResetError):
+        await request
+    assert not protocol.is_open
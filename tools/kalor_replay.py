@@ -0,0 +1,172 @@
+"""Воспроизведение записи трафика DuepiClient как фейкового реле.
+
+Сервер отдаёт ответы из записи (custom_components/kalor/capture.py)
+с исходными задержками или с масштабом времени. Каждое новое TCP
+подключение получает следующую записанную сессию: реконнекты,
+таймауты (ответ не отправляется) и обрывы воспроизводятся как были.
+Расхождение команд клиента с записью логируется как desync.
+capture.py загружается файлом, без пакета интеграции, поэтому
+Home Assistant для воспроизведения не нужен.
+
+    python -m tools.kalor_replay kalor_capture.jsonl --port 3900
+    python -m tools.kalor_replay kalor_capture.jsonl --time-scale 0.1
+
+Клиента (интеграцию, soak-харнесс с --relay) направить на этот порт.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+CAPTURE_PATH = (
+    Path(__file__).resolve().parent.parent
+    / "custom_components"
+    / "kalor"
+    / "capture.py"
+)
+
+
+def _load_capture_module() -> ModuleType:
+    """capture.py без пакета: __init__ интеграции тянет Home Assistant."""
+    spec = importlib.util.spec_from_file_location("kalor_capture", CAPTURE_PATH)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_capture = _load_capture_module()
+EVENT_DISCONNECT = _capture.EVENT_DISCONNECT
+EVENT_ERROR = _capture.EVENT_ERROR
+EVENT_REPLY = _capture.EVENT_REPLY
+EVENT_REQUEST = _capture.EVENT_REQUEST
+load_capture = _capture.load_capture
+split_sessions = _capture.split_sessions
+
+COMMAND_LENGTH = 10  # ESC + "R" + cmd(5) + checksum(2) + "&"
+
+
+@dataclass
+class ReplayStats:
+    """Итоги воспроизведения."""
+
+    sessions: int = 0
+    requests: int = 0
+    replies: int = 0
+    desyncs: int = 0
+    client_closed_early: int = 0
+
+
+class ReplayServer:
+    """Реле, проигрывающее записанные сессии по очереди."""
+
+    def __init__(self, sessions: list[list[list[Any]]], time_scale: float) -> None:
+        self._sessions: Iterator[list[list[Any]]] = iter(sessions)
+        self._remaining = len(sessions)
+        self._time_scale = time_scale
+        self.stats = ReplayStats()
+        self.done = asyncio.Event()
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Одно подключение = одна записанная сессия."""
+        session = next(self._sessions, None)
+        if session is None:
+            writer.close()
+            return
+        self.stats.sessions += 1
+        try:
+            await reader.readuntil(b"#")  # Хендшейк
+            await self._play(session, reader, writer)
+        except (asyncio.IncompleteReadError, OSError):
+            self.stats.client_closed_early += 1
+        finally:
+            writer.close()
+            self._remaining -= 1
+            if not self._remaining:
+                self.done.set()
+
+    async def _play(
+        self,
+        session: list[list[Any]],
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Проиграть события сессии."""
+        request_at = 0.0  # Время записи последней команды, мс
+        request_seen = time.monotonic()  # Когда её прислал клиент
+        for t_ms, kind, *payload in session:
+            if kind == EVENT_REQUEST:
+                frame = await reader.readexactly(COMMAND_LENGTH)
+                request_at, request_seen = t_ms, time.monotonic()
+                self.stats.requests += 1
+                cmd = frame[2:7].decode("ascii", "replace")
+                if cmd != payload[0]:
+                    self.stats.desyncs += 1
+                    print(
+                        f"desync @{t_ms}ms: ожидалась {payload[0]}, пришла {cmd}",
+                        file=sys.stderr,
+                    )
+            elif kind == EVENT_REPLY:
+                delay = (t_ms - request_at) / 1000 * self._time_scale
+                elapsed = time.monotonic() - request_seen
+                await asyncio.sleep(max(0.0, delay - elapsed))
+                writer.write(payload[0].encode("latin-1"))
+                await writer.drain()
+                self.stats.replies += 1
+            elif kind == EVENT_ERROR:
+                return  # Реле оборвало соединение
+            elif kind == EVENT_DISCONNECT:
+                await reader.read()  # Ждём, пока клиент закроет сам
+                return
+            # EVENT_TIMEOUT: ответа не было — клиент отвалится по таймауту
+
+
+async def _serve(args: argparse.Namespace) -> ReplayStats:
+    """Поднять сервер и дождаться проигрывания всех сессий."""
+    header, events = load_capture(args.capture)
+    sessions = list(split_sessions(events))
+    replay = ReplayServer(sessions, args.time_scale)
+    server = await asyncio.start_server(replay.handle, args.host, args.port)
+    port = server.sockets[0].getsockname()[1]
+    print(
+        f"Реплей {args.capture} ({header.get('device')}, {len(sessions)} сессий) "
+        f"на {args.host}:{port}",
+        file=sys.stderr,
+    )
+    async with server:
+        if sessions:
+            await replay.done.wait()
+    return replay.stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", type=Path, help="Файл записи (.jsonl)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="Множитель задержек: 1 — как в записи, 0 — без задержек",
+    )
+    args = parser.parse_args(argv)
+    stats = asyncio.run(_serve(args))
+    print(json.dumps(asdict(stats), indent=2))
+
+
+if __name__ == "__main__":
+    main()
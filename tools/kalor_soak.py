@@ -0,0 +1,460 @@
+"""Soak-тест флота печей: N записей Kalor в одном ядре Home Assistant.
+
+Скрипт поднимает ядро HA (event loop, шина, state machine, реестры,
+config entries, Store) во временном каталоге конфигурации и добавляет
+N печей сервисом kalor.import_stoves. Каждая печь — настоящая пара
+KalorCoordinator + DuepiClient с entities всех платформ; поллинг идёт
+таймерами DataUpdateCoordinator. Фейковое реле отвечает
+с реалистичной задержкой и инжектит сбои: потерянный ответ (таймаут),
+разрыв соединения.
+
+По итогу — JSON-отчёт: лаг event loop, память и fd на печь, доля
+успешных поллингов, хвостовая латентность поллинга, число записей
+состояний. Память и лаг включают entities, Store и шину HA.
+
+Запуск из корня репозитория (нужен установленный homeassistant):
+
+    python -m tools.kalor_soak --stoves 100 --duration 300 --output soak.json
+
+Реле можно вынести в отдельный процесс, чтобы его CPU не попадал
+в лаг event loop ядра:
+
+    python -m tools.kalor_soak --serve-only --port 3900
+    python -m tools.kalor_soak --relay 127.0.0.1:3900 --stoves 500
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from homeassistant.setup import async_setup_component
+
+from custom_components.kalor.const import (
+    CMD_GET_ERROR,
+    CMD_GET_EXH_FAN_RPM,
+    CMD_GET_FUMES_TEMP,
+    CMD_GET_PELLET_SPEED,
+    CMD_GET_POWER_LEVEL,
+    CMD_GET_ROOM_TEMP,
+    CMD_GET_SETPOINT,
+    CMD_GET_STATUS,
+    DEFAULT_TRANSPORT,
+    DOMAIN,
+    IMPORT_MAX_CONCURRENCY,
+    SCAN_INTERVAL,
+    SERVICE_IMPORT_STOVES,
+    STATE_WORKING,
+    TRANSPORT_PROTOCOL,
+    TRANSPORT_STREAM,
+)
+from custom_components.kalor.coordinator import KalorCoordinator
+
+MANIFEST = Path(__file__).resolve().parents[1] / "custom_components/kalor/manifest.json"
+COMMAND_LENGTH = 10  # ESC + "R" + cmd(5) + checksum(2) + "&"
+LAG_PROBE_INTERVAL = 0.1  # сек
+
+# Правдоподобные значения регистров для ответов реле
+REGISTER_VALUES: dict[str, int] = {
+    CMD_GET_ROOM_TEMP: 215,
+    CMD_GET_FUMES_TEMP: 140,
+    CMD_GET_POWER_LEVEL: 3,
+    CMD_GET_PELLET_SPEED: 28,
+    CMD_GET_EXH_FAN_RPM: 140,
+    CMD_GET_ERROR: 0,
+    CMD_GET_SETPOINT: 22,
+}
+
+
+# --- Фейковое реле ---
+
+
+@dataclass(kw_only=True)
+class RelayConfig:
+    """Задержки и вероятности сбоев фейкового реле."""
+
+    latency_ms: float = 80.0  # Медиана задержки ответа
+    jitter: float = 0.5  # sigma логнормального разброса
+    drop_rate: float = 0.002  # Ответ не приходит → таймаут клиента
+    disconnect_rate: float = 0.0005  # Реле рвёт соединение
+
+
+def _reply(cmd: str) -> bytes:
+    """10-байтный ответ на команду чтения."""
+    if cmd == CMD_GET_STATUS:
+        return f"\x1b{STATE_WORKING:08X}&".encode("ascii")
+    value = REGISTER_VALUES.get(cmd, 0)
+    return f"\x1b{value:04X}0000&".encode("ascii")
+
+
+class FakeRelay:
+    """Локальная замена duepiwebserver2.com."""
+
+    def __init__(self, config: RelayConfig, seed: int) -> None:
+        self._config = config
+        self._rng = random.Random(seed)
+        self._server: asyncio.Server | None = None
+        self.port = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Поднять сервер."""
+        self._server = await asyncio.start_server(
+            self._handle, host, port, backlog=4096
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Остановить сервер."""
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Сессия одного клиента: хендшейк, затем команда → ответ."""
+        cfg = self._config
+        try:
+            await reader.readuntil(b"#")
+            while True:
+                frame = await reader.readexactly(COMMAND_LENGTH)
+                roll = self._rng.random()
+                if roll < cfg.disconnect_rate:
+                    break
+                if roll < cfg.disconnect_rate + cfg.drop_rate:
+                    continue
+                delay = cfg.latency_ms * self._rng.lognormvariate(0, cfg.jitter)
+                await asyncio.sleep(delay / 1000)
+                writer.write(_reply(frame[2:7].decode("ascii")))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+# --- Печи ---
+
+
+@dataclass
+class StoveStats:
+    """Счётчики одной печи."""
+
+    attempted: int = 0
+    completed: int = 0
+    failed: int = 0
+    durations: list[float] = field(default_factory=list)
+
+
+def _instrument(coordinator: KalorCoordinator, stats: StoveStats) -> None:
+    """Считать поллинги координатора, не меняя его поведения."""
+    update = coordinator._async_update_data
+
+    async def _timed_update() -> Any:
+        started = time.monotonic()
+        stats.attempted += 1
+        try:
+            data = await update()
+        except UpdateFailed:
+            stats.failed += 1
+            raise
+        stats.completed += 1
+        stats.durations.append(time.monotonic() - started)
+        return data
+
+    coordinator._async_update_data = _timed_update  # type: ignore[method-assign]
+
+
+# --- Ядро HA ---
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Ядро HA без frontend/http: реестры, config entries, Store."""
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config.skip_pip = True
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    if not (
+        await async_setup_component(hass, "homeassistant", {})
+        and await async_setup_component(hass, DOMAIN, {})
+    ):
+        raise RuntimeError("Не удалось поднять ядро HA с интеграцией kalor")
+    await hass.async_start()
+    return hass
+
+
+async def _async_import_fleet(
+    hass: HomeAssistant, host: str, port: int, args: argparse.Namespace
+) -> dict[str, int]:
+    """Добавить печи через kalor.import_stoves; итоги по результатам."""
+    response = await hass.services.async_call(
+        DOMAIN,
+        SERVICE_IMPORT_STOVES,
+        {
+            "device_codes": [f"soak{idx:05d}" for idx in range(args.stoves)],
+            "host": host,
+            "port": port,
+            "transport": args.transport,
+            "max_concurrency": min(args.stoves, IMPORT_MAX_CONCURRENCY),
+        },
+        blocking=True,
+        return_response=True,
+    )
+    await hass.async_block_till_done()
+    totals: dict[str, int] = {}
+    for result in response["results"]:
+        totals[result["result"]] = totals.get(result["result"], 0) + 1
+    return totals
+
+
+async def _probe_loop_lag(samples: list[float], stop: asyncio.Event) -> None:
+    """Лаг event loop: насколько sleep просыпается позже заказанного."""
+    while not stop.is_set():
+        started = time.monotonic()
+        await asyncio.sleep(LAG_PROBE_INTERVAL)
+        samples.append(time.monotonic() - started - LAG_PROBE_INTERVAL)
+
+
+# --- Системные метрики ---
+
+
+def _rss_bytes() -> int:
+    """Текущий RSS процесса."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # macOS: ru_maxrss в байтах (пик, а не текущий)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _open_fds() -> int | None:
+    """Число открытых файловых дескрипторов."""
+    for path in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return None
+
+
+def _raise_fd_limit() -> None:
+    """Поднять soft-лимит fd до hard — на 1000 печей нужно >2000 сокетов."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def _percentiles(values: list[float], scale: float = 1000.0) -> dict[str, float | None]:
+    """p50/p95/p99/max, по умолчанию в миллисекундах."""
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(q: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale, 2)
+
+    return {
+        "p50": pick(0.50),
+        "p95": pick(0.95),
+        "p99": pick(0.99),
+        "max": round(ordered[-1] * scale, 2),
+    }
+
+
+# --- Прогон ---
+
+
+async def run_soak(args: argparse.Namespace) -> dict[str, Any]:
+    """Один прогон; возвращает отчёт."""
+    relay: FakeRelay | None = None
+    if args.relay:
+        host, _, port_str = args.relay.rpartition(":")
+        port = int(port_str)
+    else:
+        relay = FakeRelay(_relay_config(args), args.seed)
+        await relay.start()
+        host, port = "127.0.0.1", relay.port
+
+    rss_base = _rss_bytes()
+    fds_base = _open_fds()
+    with tempfile.TemporaryDirectory(prefix="kalor_soak_") as config_dir:
+        setup_started = time.monotonic()
+        hass = await _async_start_hass(config_dir)
+        imported = await _async_import_fleet(hass, host, port, args)
+        entries = hass.config_entries.async_entries(DOMAIN)
+        setup_elapsed = time.monotonic() - setup_started
+
+        stats = [StoveStats() for _ in entries]
+        for entry, st in zip(entries, stats, strict=True):
+            _instrument(entry.runtime_data, st)
+
+        state_changes = 0
+
+        @callback
+        def _count_state_change(_event: Event) -> None:
+            nonlocal state_changes
+            state_changes += 1
+
+        unsub_states = hass.bus.async_listen(EVENT_STATE_CHANGED, _count_state_change)
+        lag: list[float] = []
+        stop = asyncio.Event()
+        lag_task = asyncio.create_task(_probe_loop_lag(lag, stop))
+        started = time.monotonic()
+        deadline = started + args.duration
+        rss_peak = rss_base
+        fds_peak = fds_base or 0
+        while time.monotonic() < deadline:
+            await asyncio.sleep(1)
+            rss_peak = max(rss_peak, _rss_bytes())
+            fds_peak = max(fds_peak, _open_fds() or 0)
+        stop.set()
+        await lag_task
+        elapsed = time.monotonic() - started
+        unsub_states()
+        # Итоги на момент дедлайна: поллинги, ещё идущие при выгрузке,
+        # в доле успешных не учитываются
+        completed = sum(st.completed for st in stats)
+        failed = sum(st.failed for st in stats)
+        in_flight = sum(st.attempted for st in stats) - completed - failed
+        durations = [d for st in stats for d in st.durations]
+
+        # Выгрузка закрывает соединения; остановка ядра сбрасывает Store
+        await asyncio.gather(
+            *(hass.config_entries.async_unload(entry.entry_id) for entry in entries)
+        )
+        await hass.async_stop()
+
+    if relay:
+        await relay.stop()
+
+    stoves = len(entries)
+    attempted = completed + failed
+    return {
+        "version": json.loads(MANIFEST.read_text())["version"],
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        # Что входит в замер: ядро HA, KalorCoordinator, DuepiClient, entities
+        "scope": "ha_core",
+        "params": {
+            "stoves": args.stoves,
+            "duration_s": args.duration,
+            "interval_s": SCAN_INTERVAL.total_seconds(),
+            "seed": args.seed,
+            "transport": args.transport,
+            "relay": args.relay or "in-process",
+            **({} if args.relay else vars(_relay_config(args))),
+        },
+        "setup": {
+            "elapsed_s": round(setup_elapsed, 1),
+            "import_results": imported,
+            "entries_loaded": stoves,
+        },
+        "elapsed_s": round(elapsed, 1),
+        "loop_lag_ms": _percentiles(lag),
+        "memory": {
+            "rss_base_bytes": rss_base,
+            "rss_peak_bytes": rss_peak,
+            "per_stove_bytes": (rss_peak - rss_base) // max(1, stoves),
+        },
+        "fds": {
+            "base": fds_base,
+            "peak": fds_peak,
+            "per_stove": round((fds_peak - (fds_base or 0)) / max(1, stoves), 2),
+        },
+        "polls": {
+            "attempted": attempted,
+            "completed": completed,
+            "failed": failed,
+            "in_flight_at_end": in_flight,
+            "completion_rate": round(completed / attempted, 4) if attempted else None,
+            "per_second": round(completed / elapsed, 2) if elapsed else None,
+        },
+        "poll_latency_ms": _percentiles(durations),
+        "state_changes": {
+            "total": state_changes,
+            "per_second": round(state_changes / elapsed, 2) if elapsed else None,
+        },
+    }
+
+
+def _relay_config(args: argparse.Namespace) -> RelayConfig:
+    """RelayConfig из аргументов CLI."""
+    return RelayConfig(
+        latency_ms=args.latency_ms,
+        jitter=args.jitter,
+        drop_rate=args.drop_rate,
+        disconnect_rate=args.disconnect_rate,
+    )
+
+
+async def serve_only(args: argparse.Namespace) -> None:
+    """Только фейковое реле — для прогона в отдельном процессе."""
+    relay = FakeRelay(_relay_config(args), args.seed)
+    await relay.start(args.host, args.port)
+    print(f"Фейковое реле на {args.host}:{relay.port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await relay.stop()
+
+
+def _parse_args(argv: list[str] | None) -> argparse.Namespace:
+    """Аргументы CLI."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stoves", type=int, default=10, help="Число печей (10-1000)")
+    parser.add_argument("--duration", type=float, default=60.0, help="Длительность, сек")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--transport",
+        choices=[TRANSPORT_STREAM, TRANSPORT_PROTOCOL],
+        default=DEFAULT_TRANSPORT,
+    )
+    parser.add_argument("--output", type=Path, help="Файл JSON-отчёта (иначе stdout)")
+    parser.add_argument("--relay", help="host:port внешнего фейкового реле")
+    parser.add_argument("--serve-only", action="store_true", help="Только реле")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес реле для --serve-only")
+    parser.add_argument("--port", type=int, default=0, help="Порт реле для --serve-only")
+    parser.add_argument("--latency-ms", type=float, default=RelayConfig.latency_ms)
+    parser.add_argument("--jitter", type=float, default=RelayConfig.jitter)
+    parser.add_argument("--drop-rate", type=float, default=RelayConfig.drop_rate)
+    parser.add_argument(
+        "--disconnect-rate", type=float, default=RelayConfig.disconnect_rate
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Точка входа CLI."""
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    _raise_fd_limit()
+    if args.serve_only:
+        asyncio.run(serve_only(args))
+        return
+    report = json.dumps(asyncio.run(run_soak(args)), indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()